@@ -0,0 +1,107 @@
+"""
+Import time benchmark
+
+Measure the cold-start cost of each cron entry point and of a Jasper
+instance. The top-level imports of every script are executed in a fresh
+interpreter, without running the task itself.
+
+Usage: python3 benchmarks/import_time.py [--runs N] [--json]
+
+The code is licensed under the MIT license.
+"""
+
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Root directory of the repository
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_imports(path: str) -> str:
+    """
+    Get the top-level import statements of a script as source code
+    """
+    with open(path, "r", encoding="UTF-8") as file:
+        source = file.read()
+
+    return "\n".join(
+        ast.get_source_segment(source, node)
+        for node in ast.parse(source).body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+def measure(code: str, runs: int) -> float:
+    """
+    Get the best wall time (seconds) of running code in a fresh interpreter
+    """
+    timings = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", code],
+            check=True,
+            cwd=ROOT,
+            env={**os.environ, "PYTHONPATH": ROOT},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def main() -> None:
+    """
+    Run the benchmark for all cron scripts
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--runs", type=int, default=3, help="runs per script")
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    args = parser.parse_args()
+
+    # Interpreter start-up without any imports
+    baseline = measure("pass", args.runs)
+    results = {}
+
+    # Creating & closing an instance without touching the DB
+    results["jasper.Jasper()"] = (
+        measure('from jasper import Jasper\nJasper("benchmark").close()', args.runs)
+        - baseline
+    )
+
+    for directory, _, files in sorted(os.walk(os.path.join(ROOT, "cron"))):
+        for file in sorted(files):
+            if not file.endswith(".py"):
+                continue
+
+            path = os.path.join(directory, file)
+            try:
+                duration = measure(get_imports(path), args.runs) - baseline
+            except subprocess.CalledProcessError:
+                duration = None
+
+            results[os.path.relpath(path, ROOT)] = duration
+
+    if args.json:
+        print(json.dumps({"baseline": baseline, "scripts": results}, indent=4))
+        return None
+
+    print(f"{'Interpreter baseline':<60} {baseline * 1000:>8.1f} ms")
+    for script, duration in sorted(
+        results.items(), key=lambda item: (item[1] is None, -(item[1] or 0))
+    ):
+        timing = f"{duration * 1000:>8.1f} ms" if duration is not None else "  failed"
+        print(f"{script:<60} {timing}")
+
+    return None
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ import pandas as pd
 import pyproj
 import verde as vd
 from jasper import Jasper
+from jasper.helpers import bulk_cd
 
 
 # General configuration
@@ -207,7 +208,7 @@ if len(raw.index):
 
             # Transfer to bulk server
             with open(filename, "rb") as file:
-                jsp.bulk().cwd(f"/gridded/daily/{parameter}")
+                bulk_cd(jsp.bulk(), f"/gridded/daily/{parameter}")
                 jsp.bulk().storbinary(f'STOR {date.strftime("%Y-%m-%d")}.nc', file)
 
             # Remove temp file
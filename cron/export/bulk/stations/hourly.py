@@ -7,62 +7,69 @@ The code is licensed under the MIT license.
 from sys import argv
 from datetime import datetime
 from jasper import Jasper
-from jasper.helpers import read_file, get_stations
+from jasper.helpers import (
+    read_file,
+    get_changes,
+    get_stations,
+    group_by_year,
+    split_flags,
+)
 from jasper.actions import export_csv
 
 
 # Task mode
-# 'all', 'recent' or 'live'
+# 'all', 'recent', 'live' or 'changes'
 MODE = argv[1]
 
 # General configuration
-STATIONS_PER_CYCLE = {"live": 60, "recent": 36, "all": 1}[MODE]
+STATIONS_PER_CYCLE = {"live": 60, "recent": 36, "all": 1, "changes": None}[MODE]
+# Changelog entries per cycle (changes mode)
+CHANGES_PER_CYCLE = 500
+# Tables which feed the hourly bulk data
+TABLES = [
+    "hourly_national",
+    "hourly_isd",
+    "hourly_synop",
+    "hourly_metar",
+    "hourly_model",
+]
 
 # Create Jasper instance
 jsp = Jasper(f"export.bulk.hourly.{MODE}")
 
 
-def write_dump(data: list, station: str, year: int = None) -> None:
+def write_dump(data: list, flags: list, station: str, year: int = None) -> None:
     """
-    Convert DataFrame to CSV and export to bulk server
+    Export data and source map to bulk server
     """
     # The file path
     path = "/hourly"
 
-    # Filter rows by year if set
+    # Add year to path if set
     if year is not None:
         path += f"/{year}"
-        data = list(filter(lambda row: int(row[0].year) == year, data))
 
     # Export data dump
-    export_csv(jsp, list(map(lambda d: d[:13], data)), f"{path}/{station}.csv.gz")
+    export_csv(jsp, data, f"{path}/{station}.csv.gz")
 
     # Export source map
-    # pylint: disable=consider-using-generator
-    export_csv(
-        jsp,
-        list(
-            map(
-                lambda d: d[:2]
-                + tuple(
-                    [
-                        "".join(sorted(list(set(flag)))) if flag is not None else None
-                        for flag in d[13:]
-                    ]
-                ),
-                data,
-            )
-        ),
-        f"{path}/{station}.map.csv.gz",
-    )
+    export_csv(jsp, flags, f"{path}/{station}.map.csv.gz")
 
 
 # Get weather stations
-stations = get_stations(
-    jsp,
-    read_file(f"hourly_stations_{MODE}.sql"),
-    STATIONS_PER_CYCLE,
-)
+if MODE == "changes":
+    # Get the next changelog entries
+    # Requires [db] track_changes, the 'all' mode covers everything else
+    changes, state = get_changes(
+        jsp, jsp.get_var("changelog_cursor"), TABLES, CHANGES_PER_CYCLE
+    )
+    stations = [(station,) for station in changes]
+else:
+    stations = get_stations(
+        jsp,
+        read_file(f"hourly_stations_{MODE}.sql"),
+        STATIONS_PER_CYCLE,
+    )
 
 # Start & end year
 now = datetime.now()
@@ -81,19 +88,31 @@ for station in stations:
     )
 
     if result.rowcount > 0:
-        # Fetch data
-        data = result.fetchall()
+        # Fetch data & split off source flags
+        data, flags = split_flags(result.fetchall(), 2, 13)
 
         # Write all data
-        if MODE == "all":
-            write_dump(data, station[0])
+        if MODE in ("all", "changes"):
+            write_dump(data, flags, station[0])
 
         # Write annually
-        first_year = int(data[0][0].year)
-        last_year = int(data[-1][0].year)
+        data_years = group_by_year(data)
+        flag_years = group_by_year(flags)
+        first_year = min(data_years)
+        last_year = max(data_years)
 
         for year in range(first_year, last_year + 1):
-            write_dump(data, station[0], year)
+            # Skip unchanged years
+            if MODE == "changes" and year not in changes[station[0]]:
+                continue
+            write_dump(
+                data_years.get(year, []), flag_years.get(year, []), station[0], year
+            )
+
+# Move the changelog cursor once all files have been uploaded
+if MODE == "changes":
+    jsp.wait_uploads()
+    jsp.set_var("changelog_cursor", state)
 
 # Close Jasper instance
 jsp.close()
@@ -7,7 +7,7 @@ The code is licensed under the MIT license.
 from sys import argv
 from datetime import datetime
 from jasper import Jasper
-from jasper.helpers import get_stations
+from jasper.helpers import get_stations, group_by_year
 from jasper.actions import export_csv
 
 # Task mode
@@ -28,10 +28,9 @@ def write_dump(data: list, station: str, year: int = None) -> None:
     # The file path
     path = "/hourly/obs"
 
-    # Filter rows by year if set
+    # Add year to path if set
     if year is not None:
         path += f"/{year}"
-        data = list(filter(lambda row: int(row[0].year) == year, data))
 
     # Export data dump
     export_csv(jsp, list(map(lambda d: d[:13], data)), f"{path}/{station}.csv.gz")
@@ -181,11 +180,12 @@ for station in stations:
             write_dump(data, station[0])
 
         # Write annually
-        first_year = int(data[0][0].year)
-        last_year = int(data[-1][0].year)
+        years = group_by_year(data)
+        first_year = min(years)
+        last_year = max(years)
 
         for year in range(first_year, last_year + 1):
-            write_dump(data, station[0], year)
+            write_dump(years.get(year, []), station[0], year)
 
 # Close Jasper instance
 jsp.close()
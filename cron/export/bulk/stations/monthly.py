@@ -5,7 +5,7 @@ The code is licensed under the MIT license.
 """
 
 from jasper import Jasper
-from jasper.helpers import read_file, get_stations
+from jasper.helpers import read_file, get_stations, split_flags
 from jasper.actions import export_csv
 
 
@@ -29,34 +29,14 @@ for station in stations:
     )
 
     if result.rowcount > 0:
-        # Fetch data
-        data = result.fetchall()
+        # Fetch data & split off source flags
+        data, flags = split_flags(result.fetchall(), 2, 9)
 
         # Export data dump
-        export_csv(
-            jsp, list(map(lambda d: d[:9], data)), f"/monthly/{station[0]}.csv.gz"
-        )
+        export_csv(jsp, data, f"/monthly/{station[0]}.csv.gz")
 
         # Export source map
-        # pylint: disable=consider-using-generator
-        export_csv(
-            jsp,
-            list(
-                map(
-                    lambda d: d[:2]
-                    + tuple(
-                        [
-                            "".join(sorted(list(set(flag))))
-                            if flag is not None
-                            else None
-                            for flag in d[9:]
-                        ]
-                    ),
-                    data,
-                )
-            ),
-            f"/monthly/{station[0]}.map.csv.gz",
-        )
+        export_csv(jsp, flags, f"/monthly/{station[0]}.map.csv.gz")
 
 # Close Jasper instance
 jsp.close()
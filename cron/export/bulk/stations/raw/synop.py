@@ -5,7 +5,7 @@ The code is licensed under the MIT license.
 """
 
 from jasper import Jasper
-from jasper.helpers import read_file, get_stations
+from jasper.helpers import read_file, get_stations, group_by_year
 from jasper.actions import export_csv
 
 
@@ -30,18 +30,14 @@ for station in stations:
             data = result.fetchall()
 
             # Write annually
-            first_year = int(data[0][0])
-            last_year = int(data[-1][0])
+            years = group_by_year(data)
 
-            for year in range(first_year, last_year + 1):
+            for year, d in years.items():
                 try:
-                    d = list(filter(lambda row: int(row[0]) == year, data))
-
-                    if len(d) > 0:
-                        # Export data dump
-                        export_csv(
-                            jsp, [list(result.keys())] + d, f"/raw/synop/{year}/{station[0]}.csv.gz"
-                        )
+                    # Export data dump
+                    export_csv(
+                        jsp, [list(result.keys())] + d, f"/raw/synop/{year}/{station[0]}.csv.gz"
+                    )
                 except:
                     pass
     except:
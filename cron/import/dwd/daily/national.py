@@ -6,16 +6,14 @@ Get daily data for weather stations in Germany.
 The code is licensed under the MIT license.
 """
 
-import os
-from io import BytesIO
 import sys
 from ftplib import FTP
-from zipfile import ZipFile
 from datetime import datetime
-import hashlib
 import pandas as pd
 from jasper import Jasper
-from jasper.convert import pres_to_msl, ms_to_kmh
+from jasper.stations import resolve_station
+from jasper.helpers import ftp_zip_member
+from jasper.convert import pres_to_msl_array, ms_to_kmh_array
 from jasper.schema import daily_national
 from jasper.actions import persist
 
@@ -88,39 +86,22 @@ for remote_file in files:
         national_id = (
             str(remote_file[-13:-8]) if MODE == "recent" else str(remote_file[-32:-27])
         )
-        station_df = pd.read_sql(
-            f"SELECT `id`, `altitude` FROM `stations` WHERE `national_id` LIKE '{national_id}'",
-            jsp.db(),
-        )
-        station = station_df.iloc[0][0]
-        altitude = station_df.iloc[0][1]
-
-        # Get remote file
-        file_hash = hashlib.md5(remote_file.encode("utf-8")).hexdigest()
-        local_file = os.path.dirname(__file__) + os.sep + file_hash
-        # pylint: disable=consider-using-with
-        ftp.retrbinary("RETR " + remote_file, open(local_file, "wb").write)
-
-        # Unzip file
-        zipped = ZipFile(local_file, "r")
-        filelist = zipped.namelist()
-        raw = None
-        for file in filelist:
-            if file[:7] == "produkt":
-                raw = BytesIO(zipped.open(file, "r").read())
-
-        # Remove ZIP file
-        os.remove(local_file)
+        station = resolve_station(jsp, "national_id", national_id)
+        if station is None:
+            continue
+        altitude = station["altitude"]
+        station = station["id"]
 
         # Convert raw data to DataFrame
-        df: pd.DataFrame = pd.read_csv(
-            raw,
-            sep=r"\s*;\s*",
-            date_parser=dateparser,
-            na_values=["-999", -999],
-            usecols=USECOLS,
-            parse_dates=PARSE_DATES,
-        )
+        with ftp_zip_member(ftp, remote_file) as raw:
+            df: pd.DataFrame = pd.read_csv(
+                raw,
+                sep=r"\s*;\s*",
+                date_parser=dateparser,
+                na_values=["-999", -999],
+                usecols=USECOLS,
+                parse_dates=PARSE_DATES,
+            )
 
         # Rename columns
         df = df.rename(columns=lambda x: x.strip())
@@ -128,10 +109,10 @@ for remote_file in files:
 
         # Convert data
         df["snow"] = df["snow"] * 10
-        df["wpgt"] = df["wpgt"].apply(ms_to_kmh)
-        df["wspd"] = df["wspd"].apply(ms_to_kmh)
+        df["wpgt"] = ms_to_kmh_array(df["wpgt"])
+        df["wspd"] = ms_to_kmh_array(df["wspd"])
         df["tsun"] = df["tsun"] * 60
-        df["pres"] = df.apply(lambda row, alt=altitude: pres_to_msl(row, alt), axis=1)
+        df["pres"] = pres_to_msl_array(df["pres"], df["tavg"], altitude)
 
         # Add weather station ID
         df["station"] = station
@@ -4,15 +4,13 @@ DWD daily solar radiation data
 The code is licensed under the MIT license.
 """
 
-import os
-from io import BytesIO
 import sys
 from ftplib import FTP
-from zipfile import ZipFile
 from datetime import datetime
-import hashlib
 import pandas as pd
 from jasper import Jasper
+from jasper.stations import resolve_station
+from jasper.helpers import ftp_zip_member
 from jasper.convert import jcm2_to_wm2
 from jasper.schema import daily_national
 from jasper.actions import persist
@@ -71,38 +69,21 @@ for remote_file in files:
     try:
         # Get meta info for weather station
         national_id = str(remote_file[-13:-8])
-        station_df = pd.read_sql(
-            f"SELECT `id` FROM `stations` WHERE `national_id` LIKE '{national_id}'",
-            jsp.db(),
-        )
-        station = station_df.iloc[0][0]
-
-        # Get remote file
-        file_hash = hashlib.md5(remote_file.encode("utf-8")).hexdigest()
-        local_file = os.path.dirname(__file__) + os.sep + file_hash
-        # pylint: disable=consider-using-with
-        ftp.retrbinary("RETR " + remote_file, open(local_file, "wb").write)
-
-        # Unzip file
-        zipped = ZipFile(local_file, "r")
-        filelist = zipped.namelist()
-        raw = None
-        for file in filelist:
-            if file[:7] == "produkt":
-                raw = BytesIO(zipped.open(file, "r").read())
-
-        # Remove ZIP file
-        os.remove(local_file)
+        station = resolve_station(jsp, "national_id", national_id)
+        if station is None:
+            continue
+        station = station["id"]
 
         # Convert raw data to DataFrame
-        df: pd.DataFrame = pd.read_csv(
-            raw,
-            sep=r"\s*;\s*",
-            date_parser=dateparser,
-            na_values=["-999", -999],
-            usecols=USECOLS,
-            parse_dates=PARSE_DATES,
-        )
+        with ftp_zip_member(ftp, remote_file) as raw:
+            df: pd.DataFrame = pd.read_csv(
+                raw,
+                sep=r"\s*;\s*",
+                date_parser=dateparser,
+                na_values=["-999", -999],
+                usecols=USECOLS,
+                parse_dates=PARSE_DATES,
+            )
 
         # Rename columns
         df = df.rename(columns=lambda x: x.strip())
@@ -14,11 +14,11 @@ from lxml import etree
 import pandas as pd
 from jasper import Jasper
 from jasper.convert import (
-    jcm2_to_wm2,
-    kelvin_to_celsius,
-    ms_to_kmh,
-    percentage_to_okta,
-    temp_dwpt_to_rhum,
+    jcm2_to_wm2_array,
+    kelvin_to_celsius_array,
+    ms_to_kmh_array,
+    percentage_to_okta_array,
+    temp_dwpt_to_rhum_array,
 )
 from jasper.helpers import get_stations, read_file
 from jasper.schema import hourly_model
@@ -179,7 +179,7 @@ for station in stations:
             .split()
         ):
             data["temp"].append(
-                kelvin_to_celsius(float(value))
+                float(value)
                 if value.lstrip("-").replace(".", "", 1).isdigit()
                 else None
             )
@@ -198,7 +198,7 @@ for station in stations:
             .split()
         ):
             data["dwpt"].append(
-                kelvin_to_celsius(float(value))
+                float(value)
                 if value.lstrip("-").replace(".", "", 1).isdigit()
                 else None
             )
@@ -236,7 +236,7 @@ for station in stations:
             .split()
         ):
             data["wspd"].append(
-                ms_to_kmh(float(value))
+                float(value)
                 if value.lstrip("-").replace(".", "", 1).isdigit()
                 else None
             )
@@ -255,7 +255,7 @@ for station in stations:
             .split()
         ):
             data["wpgt"].append(
-                ms_to_kmh(float(value))
+                float(value)
                 if value.lstrip("-").replace(".", "", 1).isdigit()
                 else None
             )
@@ -355,7 +355,7 @@ for station in stations:
             .split()
         ):
             data["cldc"].append(
-                percentage_to_okta(float(value))
+                float(value)
                 if value.lstrip("-").replace(".", "", 1).isdigit()
                 else None
             )
@@ -385,12 +385,18 @@ for station in stations:
         # Convert time strings to datetime
         df["time"] = pd.to_datetime(df["time"])
 
+        # Convert units
+        df["temp"] = kelvin_to_celsius_array(df["temp"])
+        df["dwpt"] = kelvin_to_celsius_array(df["dwpt"])
+        df["wspd"] = ms_to_kmh_array(df["wspd"])
+        df["wpgt"] = ms_to_kmh_array(df["wpgt"])
+        df["cldc"] = percentage_to_okta_array(df["cldc"])
+
         # Convert SRAD to W/M^2
-        df["srad"] = df["srad"].apply(jcm2_to_wm2)
+        df["srad"] = jcm2_to_wm2_array(df["srad"])
 
         # Calculate humidity data
-        # pylint: disable=unnecessary-lambda
-        df["rhum"] = df.apply(lambda row: temp_dwpt_to_rhum(row), axis=1)
+        df["rhum"] = temp_dwpt_to_rhum_array(df["temp"], df["dwpt"])
 
         # Drop dew point column
         df = df.drop("dwpt", axis=1)
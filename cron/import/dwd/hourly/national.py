@@ -6,16 +6,15 @@ Get hourly data for weather stations in Germany.
 The code is licensed under the MIT license.
 """
 
-import os
-from io import BytesIO
+import re
 import sys
 from typing import Union
 from ftplib import FTP
-from zipfile import ZipFile
 from datetime import datetime
-import hashlib
 import pandas as pd
 from jasper import Jasper
+from jasper.stations import resolve_station
+from jasper.helpers import ftp_listing, ftp_zip_member
 from jasper.convert import jcm2_to_wm2, ms_to_kmh
 from jasper.schema import hourly_national
 from jasper.actions import persist
@@ -163,6 +162,7 @@ def get_condicode(code: str) -> Union[int, None]:
 # General configuration
 MODE = sys.argv[1]  # 'recent' or 'historical'
 DWD_FTP_SERVER = "opendata.dwd.de"  # DWD open data server
+ROOT_DIR = "/climate_environment/CDC/observations_germany/climate/hourly"
 BASE_DIR = f"precipitation/{MODE}"  # Base directory on DWD server
 STATIONS_PER_CYCLE = int(sys.argv[2])  # Number of weather stations per execution
 # Parameter config
@@ -243,6 +243,7 @@ counter = 0  # The task's counter
 skip = 3  # How many lines to skip
 stations = []  # List of weather stations
 df_full: Union[pd.DataFrame, None] = None  # DataFrame which holds all data
+file_index = {}  # File names by national ID per directory
 
 # Create Jasper instance
 jsp = Jasper(f"import.dwd.hourly.national.{MODE}")
@@ -262,10 +263,16 @@ def find_file(path: str, needle: str):
     match = None
 
     try:
-        ftp.cwd("/climate_environment/CDC/observations_germany/climate/hourly/" + path)
-        files = ftp.nlst()
-        matching = [f for f in files if needle in f]
-        match = matching[0]
+        # Index file names by national ID once per directory
+        if path not in file_index:
+            index = {}
+            for file in ftp_listing(jsp, ftp, f"{ROOT_DIR}/{path}"):
+                national_id = re.search(r"_(\d{5})_", file)
+                if national_id is not None:
+                    index.setdefault(national_id.group(1), file)
+            file_index[path] = index
+
+        match = f"{ROOT_DIR}/{path}/{file_index[path][needle]}"
     except BaseException:
         pass
 
@@ -275,7 +282,6 @@ def find_file(path: str, needle: str):
 # Connect to FTP server
 ftp = FTP(DWD_FTP_SERVER)
 ftp.login()
-ftp.cwd(f"/climate_environment/CDC/observations_germany/climate/hourly/{BASE_DIR}")
 
 # Get counter value
 counter = jsp.get_var("station_counter", 0, int)
@@ -284,7 +290,7 @@ skip = 3 if counter == 0 else 3 + counter
 # Get all files in directory
 try:
     endpos = STATIONS_PER_CYCLE + skip
-    stations = ftp.nlst()[skip:endpos]
+    stations = ftp_listing(jsp, ftp, f"{ROOT_DIR}/{BASE_DIR}")[skip:endpos]
 except BaseException:
     pass
 
@@ -303,12 +309,10 @@ for station_file in stations:
             if MODE == "recent"
             else str(station_file[-32:-27])
         )
-        station = pd.read_sql(
-            f"""
-            SELECT `id` FROM `stations` WHERE `national_id` LIKE "{national_id}"
-            """,
-            jsp.db(),
-        ).iloc[0][0]
+        station = resolve_station(jsp, "national_id", national_id)
+        if station is None:
+            continue
+        station = station["id"]
 
         # DataFrame which holds data for one weather station
         df_station = None
@@ -319,35 +323,19 @@ for station_file in stations:
                 remote_file = find_file(parameter["dir"], national_id)
 
                 if remote_file is not None:
-                    file_hash = hashlib.md5(remote_file.encode("utf-8")).hexdigest()
-                    local_file = os.path.dirname(__file__) + os.sep + file_hash
-                    with open(local_file, "wb") as f:
-                        ftp.retrbinary("RETR " + remote_file, f.write)
-
-                    # Unzip file
-                    with ZipFile(local_file, "r") as zipped:
-                        filelist = zipped.namelist()
-                        raw = None
-                        for file in filelist:
-                            if file[:7] == "produkt":
-                                with zipped.open(file, "r") as reader:
-                                    raw = BytesIO(reader.read())
-
-                    # Remove ZIP file
-                    os.remove(local_file)
-
                     # Convert raw data to DataFrame
-                    df: pd.DataFrame = pd.read_csv(
-                        raw,
-                        sep=";",
-                        date_parser=dateparser,
-                        na_values="-999",
-                        usecols=parameter["usecols"],
-                        parse_dates=parameter["parse_dates"],
-                        encoding=parameter["encoding"]
-                        if "encoding" in parameter
-                        else None,
-                    )
+                    with ftp_zip_member(ftp, remote_file) as raw:
+                        df: pd.DataFrame = pd.read_csv(
+                            raw,
+                            sep=";",
+                            date_parser=dateparser,
+                            na_values="-999",
+                            usecols=parameter["usecols"],
+                            parse_dates=parameter["parse_dates"],
+                            encoding=parameter["encoding"]
+                            if "encoding" in parameter
+                            else None,
+                        )
 
                     # Rename columns
                     df = df.rename(columns=lambda x: x.strip())
@@ -12,6 +12,7 @@ import hashlib
 import pandas as pd
 from jasper import Jasper
 from jasper.actions import persist
+from jasper.stations import resolve_station
 from jasper.schema import monthly_global
 
 
@@ -200,12 +201,10 @@ for station_file in stations:
         wmo_id = (
             str(station_file[-9:-4]) if MODE == "recent" else str(station_file[-23:-18])
         )
-        station = pd.read_sql(
-            f"""
-            SELECT `id` FROM `stations` WHERE `wmo` LIKE "{wmo_id}"
-            """,
-            jsp.db(),
-        ).iloc[0][0]
+        station = resolve_station(jsp, "wmo", wmo_id)
+        if station is None:
+            continue
+        station = station["id"]
 
         # DataFrame which holds data for one weather station
         df_station = None
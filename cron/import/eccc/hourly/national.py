@@ -11,7 +11,7 @@ from multiprocessing.pool import ThreadPool
 import pandas as pd
 from jasper import Jasper
 from jasper.actions import persist
-from jasper.convert import pres_to_msl
+from jasper.convert import pres_to_msl_array
 from jasper.helpers import get_stations
 from jasper.schema import hourly_national
 
@@ -68,9 +68,7 @@ def load(station: str, year: int, month: int) -> pd.DataFrame():
 
         # Convert PRES to MSL
         df["pres"] = df["pres"] * 10
-        df["pres"] = df.apply(
-            lambda row: pres_to_msl(row, station["altitude"], "temp"), axis=1
-        )
+        df["pres"] = pres_to_msl_array(df["pres"], df["temp"], station["altitude"])
 
         # Return DataFrame
         return df
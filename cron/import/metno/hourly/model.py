@@ -6,21 +6,33 @@ Get hourly model forecasts for weather stations based on geo location
 The code is licensed under the MIT license.
 """
 
-from time import sleep
+from http.client import HTTPException
+from multiprocessing.pool import ThreadPool
+import sys
+import traceback
 from typing import Union
-from urllib import request, error
+from urllib.error import HTTPError, URLError
 import json
 import pandas as pd
 from jasper import Jasper
 from jasper.actions import persist
 from jasper.convert import percentage_to_okta
-from jasper.helpers import get_stations, read_file
+from jasper.helpers import (
+    TokenBucket,
+    get_stations,
+    http_get,
+    read_file,
+    single_run,
+)
 from jasper.schema import hourly_model
 
 
 # General configuration
-STATIONS_PER_CYCLE = 42
-SLEEP_TIME = 0.2
+STATIONS_PER_CYCLE = 240  # Finishes well within a minute at RATE_LIMIT
+THREADS = 8  # Number of threads for parallel requests
+RATE_LIMIT = 10  # Max. requests per second (Met.no allows 20 per application)
+TIMEOUT = 10  # Request timeout in seconds
+HEADERS = {"User-Agent": "meteostat.net info@meteostat.net"}
 
 # Create Jasper instance
 jsp = Jasper("import.metno.hourly.model")
@@ -79,131 +91,136 @@ def get_condicode(code: str) -> Union[int, None]:
     return condicodes.get(str(code).split("_")[0], None)
 
 
-# Get weather stations
-stations = get_stations(
-    jsp,
-    read_file("model_stations.sql"),
-    STATIONS_PER_CYCLE,
-)
-
-# DataFrame which holds all data
-df_full = None
-
-# Import data for each weather station
-if len(stations) > 0:
-    for station in stations:
-        try:
-            # Create request for JSON file
-            url = (
-                "https://api.met.no/weatherapi/locationforecast/2.0/complete.json?"
-                + f"altitude={station[3]}&lat={station[1]}&lon={station[2]}"
-            )
-            req = request.Request(
-                url, headers={"User-Agent": "meteostat.net info@meteostat.net"}
-            )
-
-            # Get JSON data
-            with request.urlopen(req) as raw:
-                data = json.loads(raw.read().decode())
-
-            # pylint: disable=line-too-long
-            # To be resolved in 1.0.0
-            def map_data(record):
-                """
-                Map JSON data
-                """
-                if station[4]:
-                    return {
-                        "time": record["time"],
-                        "prcp": record["data"]["next_1_hours"]["details"][
-                            "precipitation_amount"
-                        ]
-                        if "next_1_hours" in record["data"]
-                        and "precipitation_amount"
-                        in record["data"]["next_1_hours"]["details"]
-                        else None,
-                    }
-                else:
-                    return {
-                        "time": record["time"],
-                        "temp": record["data"]["instant"]["details"]["air_temperature"]
-                        if "air_temperature" in record["data"]["instant"]["details"]
-                        else None,
-                        "cldc": percentage_to_okta(
-                            record["data"]["instant"]["details"]["cloud_area_fraction"]
-                        )
-                        if "cloud_area_fraction" in record["data"]["instant"]["details"]
-                        else None,
-                        "rhum": record["data"]["instant"]["details"][
-                            "relative_humidity"
-                        ]
-                        if "relative_humidity" in record["data"]["instant"]["details"]
-                        else None,
-                        "prcp": record["data"]["next_1_hours"]["details"][
-                            "precipitation_amount"
-                        ]
-                        if "next_1_hours" in record["data"]
-                        and "precipitation_amount"
-                        in record["data"]["next_1_hours"]["details"]
-                        else None,
-                        "wspd": record["data"]["instant"]["details"]["wind_speed"] * 3.6
-                        if "wind_speed" in record["data"]["instant"]["details"]
-                        else None,
-                        "wpgt": record["data"]["instant"]["details"][
-                            "wind_speed_of_gust"
-                        ]
-                        * 3.6
-                        if "wind_speed_of_gust" in record["data"]["instant"]["details"]
-                        else None,
-                        "wdir": int(
-                            round(
-                                record["data"]["instant"]["details"][
-                                    "wind_from_direction"
-                                ]
-                            )
-                        )
-                        if "wind_from_direction" in record["data"]["instant"]["details"]
-                        else None,
-                        "pres": record["data"]["instant"]["details"][
-                            "air_pressure_at_sea_level"
-                        ]
-                        if "air_pressure_at_sea_level"
-                        in record["data"]["instant"]["details"]
-                        else None,
-                        "coco": get_condicode(
-                            record["data"]["next_1_hours"]["summary"]["symbol_code"]
-                        )
-                        if "next_1_hours" in record["data"]
-                        and "symbol_code" in record["data"]["next_1_hours"]["summary"]
-                        else None,
-                    }
-
-            # Create DataFrame
-            df = pd.DataFrame(map(map_data, data["properties"]["timeseries"]))
-
-            # Set index
-            df["station"] = station[0]
-            df = df.set_index(["station", "time"])
-
-            # Shift prcp and coco columns by 1 (as they refer to the next hour)
-            df["prcp"] = df["prcp"].shift(1)
-            if not station[4]:
-                df["coco"] = df["coco"].shift(1)
-
-            # Append data to full DataFrame
-            if df_full is None:
-                df_full = df
-            else:
-                df_full = df_full.append(df)
-
-        except error.HTTPError:
-            pass
+# Limit request rate across threads
+limiter = TokenBucket(RATE_LIMIT)
 
-        # Sleep
-        sleep(SLEEP_TIME)
 
-    # Write DataFrame into Meteostat database
-    persist(jsp, df_full, hourly_model)
+def load(station: tuple) -> Union[pd.DataFrame, None]:
+    """
+    Get model forecasts for a weather station
+    """
+    try:
+        # URL of JSON file
+        url = (
+            "https://api.met.no/weatherapi/locationforecast/2.0/complete.json?"
+            + f"altitude={station[3]}&lat={station[1]}&lon={station[2]}"
+        )
+
+        # Get JSON data
+        limiter.acquire()
+        data = json.loads(http_get(url, HEADERS, TIMEOUT).decode())
+
+        # pylint: disable=line-too-long
+        # To be resolved in 1.0.0
+        def map_data(record):
+            """
+            Map JSON data
+            """
+            if station[4]:
+                return {
+                    "time": record["time"],
+                    "prcp": record["data"]["next_1_hours"]["details"][
+                        "precipitation_amount"
+                    ]
+                    if "next_1_hours" in record["data"]
+                    and "precipitation_amount"
+                    in record["data"]["next_1_hours"]["details"]
+                    else None,
+                }
+            else:
+                return {
+                    "time": record["time"],
+                    "temp": record["data"]["instant"]["details"]["air_temperature"]
+                    if "air_temperature" in record["data"]["instant"]["details"]
+                    else None,
+                    "cldc": percentage_to_okta(
+                        record["data"]["instant"]["details"]["cloud_area_fraction"]
+                    )
+                    if "cloud_area_fraction" in record["data"]["instant"]["details"]
+                    else None,
+                    "rhum": record["data"]["instant"]["details"]["relative_humidity"]
+                    if "relative_humidity" in record["data"]["instant"]["details"]
+                    else None,
+                    "prcp": record["data"]["next_1_hours"]["details"][
+                        "precipitation_amount"
+                    ]
+                    if "next_1_hours" in record["data"]
+                    and "precipitation_amount"
+                    in record["data"]["next_1_hours"]["details"]
+                    else None,
+                    "wspd": record["data"]["instant"]["details"]["wind_speed"] * 3.6
+                    if "wind_speed" in record["data"]["instant"]["details"]
+                    else None,
+                    "wpgt": record["data"]["instant"]["details"]["wind_speed_of_gust"]
+                    * 3.6
+                    if "wind_speed_of_gust" in record["data"]["instant"]["details"]
+                    else None,
+                    "wdir": int(
+                        round(
+                            record["data"]["instant"]["details"]["wind_from_direction"]
+                        )
+                    )
+                    if "wind_from_direction" in record["data"]["instant"]["details"]
+                    else None,
+                    "pres": record["data"]["instant"]["details"][
+                        "air_pressure_at_sea_level"
+                    ]
+                    if "air_pressure_at_sea_level"
+                    in record["data"]["instant"]["details"]
+                    else None,
+                    "coco": get_condicode(
+                        record["data"]["next_1_hours"]["summary"]["symbol_code"]
+                    )
+                    if "next_1_hours" in record["data"]
+                    and "symbol_code" in record["data"]["next_1_hours"]["summary"]
+                    else None,
+                }
+
+        # Create DataFrame
+        df = pd.DataFrame(map(map_data, data["properties"]["timeseries"]))
+
+        # Set index
+        df["station"] = station[0]
+        df = df.set_index(["station", "time"])
+
+        # Shift prcp and coco columns by 1 (as they refer to the next hour)
+        df["prcp"] = df["prcp"].shift(1)
+        if not station[4]:
+            df["coco"] = df["coco"].shift(1)
+
+        return df
+
+    except (HTTPError, URLError, HTTPException, ConnectionError, TimeoutError):
+        # Skip stations which are temporarily unavailable
+        return None
+    except Exception:  # pylint: disable=broad-exception-caught
+        # Report unexpected responses without failing the other stations
+        print(f"Station {station[0]} failed:", file=sys.stderr)
+        traceback.print_exc()
+        return None
+
+
+# Skip if the previous run is still importing (cron starts one per minute)
+with single_run(jsp) as acquired:
+    if acquired:
+        # Get weather stations
+        stations = get_stations(
+            jsp,
+            read_file("model_stations.sql"),
+            STATIONS_PER_CYCLE,
+        )
+
+        # Import data for each weather station
+        if len(stations) > 0:
+            # Multi-thread processing
+            with ThreadPool(THREADS) as pool:
+                output = [df for df in pool.map(load, stations) if df is not None]
+
+            # Write DataFrame into Meteostat database
+            if output:
+                persist(jsp, pd.concat(output), hourly_model)
+    else:
+        print("Previous run hasn't finished, skipping", file=sys.stderr)
 
 # Close Jasper instance
 jsp.close()
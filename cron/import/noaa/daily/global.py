@@ -3,22 +3,34 @@ NOAA GHCND import routine
 
 Get daily weather data for weather stations worldwide.
 
+Usage: global.py [path]
+
+Without a path, one station per cycle is imported from the NOAA FTP
+server. Otherwise, all stations are imported from a local copy of the
+GHCN-Daily 'all' directory or the ghcnd_all.tar.gz archive.
+
 The code is licensed under the MIT license.
 """
 
 import sys
 import os
-from typing import Union
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import current_process, get_context
+import tarfile
+from typing import Iterator, Union
 import pandas as pd
 from numpy import nan
 from jasper import Jasper, ghcnd
 from jasper.actions import persist
-from jasper.convert import ms_to_kmh, percentage_to_okta
+from jasper.convert import ms_to_kmh_array, percentage_to_okta_array
 from jasper.schema import daily_global
+from jasper.stations import station_map
 
 
 # General configuration
 STATIONS_PER_CYCLE = 1
+# Number of stations per DB import in local mode
+STATIONS_PER_IMPORT = 50
 GHCN_PATH = (
     os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../..", "resources"))
     + "/ghcn.csv"
@@ -40,95 +52,184 @@ NAMES = {
 # Create Jasper instance
 jsp = Jasper("import.noaa.daily.global")
 
-# Weather stations
-stations: Union[pd.DataFrame, None] = None
-
-# Get counter value
-skip = jsp.get_var("station_counter", 0, int)
-
-# Get GHCN stations
-try:
-    stations = pd.read_csv(
-        GHCN_PATH,
-        dtype="str",
-        skiprows=skip,
-        nrows=STATIONS_PER_CYCLE,
-        names=["id", "ghcn"],
-    )
-except pd.errors.EmptyDataError:
-    pass
-
-# Update counter
-if stations is None or len(stations.index) < STATIONS_PER_CYCLE:
-    jsp.set_var("station_counter", 0)
-    sys.exit()
-else:
-    jsp.set_var("station_counter", skip + STATIONS_PER_CYCLE)
+# Number of processes for parsing local files
+WORKERS = jsp.config.getint("import", "workers", fallback=os.cpu_count())
+
+
+def transform(df: pd.DataFrame, station: str) -> pd.DataFrame:
+    """
+    Convert a parsed .dly file into the Meteostat format
+    """
+    # Filter relevant columns
+    df = df.drop(columns=[col for col in df if col not in NAMES])
 
-# DataFrame which holds all data
-df_full = None
+    # Add missing columns
+    for col in NAMES:
+        if col not in df.columns and col != "MM/DD/YYYY":
+            df[col] = nan
 
-# Connect to NOAA FTP Server
-ftp = ghcnd.connect_to_ftp()
+    # Rename columns
+    df = df.reset_index().rename(columns=NAMES)
 
-# Import data for each weather station
-# pylint: disable=no-member
-for station in stations.to_dict(orient="records"):
+    # Adapt columns
+    df["tavg"] = df["tavg"].div(10)
+    df["tmin"] = df["tmin"].div(10)
+    df["tmax"] = df["tmax"].div(10)
+    df["prcp"] = df["prcp"].div(10)
+    df["wspd"] = ms_to_kmh_array(df["wspd"].div(10))
+    df["wpgt"] = ms_to_kmh_array(df["wpgt"].div(10))
+    df["cldc"] = percentage_to_okta_array(df["cldc"])
+
+    # Add station column
+    df["station"] = station
+
+    # Set index
+    return df.set_index(["station", "time"])
+
+
+def load(station: str, ghcn: str, data: bytes) -> pd.DataFrame:
+    """
+    Parse & convert the content of a .dly file
+    """
     try:
-        df = ghcnd.dly_to_df(ftp, station["ghcn"])
-
-        # Filter relevant columns
-        required_columns = [
-            "TMAX",
-            "TMIN",
-            "TAVG",
-            "PRCP",
-            "SNWD",
-            "AWDR",
-            "AWND",
-            "TSUN",
-            "WSFG",
-            "ACMC",
-        ]
-        df = df.drop(columns=[col for col in df if col not in required_columns])
-
-        # Add missing columns
-        for col in required_columns:
-            if col not in df.columns:
-                df[col] = nan
-
-        # Rename columns
-        df = df.reset_index().rename(columns=NAMES)
-
-        # Adapt columns
-        df["tavg"] = df["tavg"].div(10)
-        df["tmin"] = df["tmin"].div(10)
-        df["tmax"] = df["tmax"].div(10)
-        df["prcp"] = df["prcp"].div(10)
-        df["wspd"] = df["wspd"].div(10).apply(ms_to_kmh)
-        df["wpgt"] = df["wpgt"].div(10).apply(ms_to_kmh)
-        df["cldc"] = df["cldc"].apply(percentage_to_okta)
-
-        # Add station column
-        df["station"] = station["id"]
-
-        # Set index
-        df = df.set_index(["station", "time"])
-
-        # Append data to full DataFrame
-        if df_full is None:
-            df_full = df
-        else:
-            df_full = df_full.append(df)
+        return transform(ghcnd.parse_dly(data, ghcn), station)
 
     except BaseException:
+        return pd.DataFrame()
+
+
+def read_local(path: str, stations: dict) -> Iterator[tuple]:
+    """
+    Get station, GHCN ID & content of all .dly files in a directory or
+    (gzipped) tar archive
+
+    Archive members are streamed, nothing is extracted to disk.
+    """
+    if os.path.isdir(path):
+        for ghcn, station in stations.items():
+            filename = os.path.join(path, f"{ghcn}.dly")
+            if os.path.isfile(filename):
+                with open(filename, "rb") as file:
+                    yield station, ghcn, file.read()
+        return None
+
+    with tarfile.open(path, "r|*") as archive:
+        for member in archive:
+            ghcn, extension = os.path.splitext(os.path.basename(member.name))
+            if member.isfile() and extension == ".dly" and ghcn in stations:
+                yield stations[ghcn], ghcn, archive.extractfile(member).read()
+
+    return None
+
+
+def process(files: Iterator[tuple]) -> Iterator[pd.DataFrame]:
+    """
+    Parse files in a process pool
+
+    At most two files per worker are held in memory at once.
+    """
+    # Pool workers (e.g. of jasper.scheduler) can't have child processes
+    if WORKERS < 2 or current_process().daemon:
+        for file in files:
+            yield load(*file)
+        return None
+
+    with ProcessPoolExecutor(WORKERS, mp_context=get_context("fork")) as executor:
+        pending = set()
+
+        for file in files:
+            pending.add(executor.submit(load, *file))
+            if len(pending) >= WORKERS * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+        for future in pending:
+            yield future.result()
+
+    return None
+
+
+def import_local(path: str) -> None:
+    """
+    Import all GHCN stations from a local directory or archive
+    """
+    stations = {
+        ghcn: station["id"] for ghcn, station in station_map(jsp, "ghcn").items()
+    }
+
+    frames = []
+
+    for df in process(read_local(path, stations)):
+        if df.index.size > 0:
+            frames.append(df)
+
+        # Write into Meteostat database
+        if len(frames) >= STATIONS_PER_IMPORT:
+            persist(jsp, pd.concat(frames), daily_global)
+            frames = []
+
+    if frames:
+        persist(jsp, pd.concat(frames), daily_global)
+
+
+def import_ftp() -> None:
+    """
+    Import the next station(s) from the NOAA FTP server
+    """
+    # Weather stations
+    stations: Union[pd.DataFrame, None] = None
+
+    # Get counter value
+    skip = jsp.get_var("station_counter", 0, int)
+
+    # Get GHCN stations
+    try:
+        stations = pd.read_csv(
+            GHCN_PATH,
+            dtype="str",
+            skiprows=skip,
+            nrows=STATIONS_PER_CYCLE,
+            names=["id", "ghcn"],
+        )
+    except pd.errors.EmptyDataError:
         pass
 
-# Write DataFrame into Meteostat database
-persist(jsp, df_full, daily_global)
+    # Update counter
+    if stations is None or len(stations.index) < STATIONS_PER_CYCLE:
+        jsp.set_var("station_counter", 0)
+        sys.exit()
+    else:
+        jsp.set_var("station_counter", skip + STATIONS_PER_CYCLE)
+
+    # DataFrames which hold all data
+    frames = []
+
+    # Connect to NOAA FTP Server
+    ftp = ghcnd.connect_to_ftp()
+
+    # Import data for each weather station
+    # pylint: disable=no-member
+    for station in stations.to_dict(orient="records"):
+        try:
+            frames.append(
+                transform(ghcnd.dly_to_df(ftp, station["ghcn"]), station["id"])
+            )
+        except BaseException:
+            pass
 
-# Quit FTP connection
-ftp.quit()
+    # Write DataFrame into Meteostat database
+    if frames:
+        persist(jsp, pd.concat(frames), daily_global)
+
+    # Quit FTP connection
+    ftp.quit()
+
+
+if len(sys.argv) > 1:
+    import_local(sys.argv[1])
+else:
+    import_ftp()
 
 # Close Jasper instance
 jsp.close()
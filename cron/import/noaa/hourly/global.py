@@ -14,7 +14,7 @@ from numpy import isnan
 import pandas as pd
 from jasper import Jasper
 from jasper.actions import persist
-from jasper.convert import ms_to_kmh, temp_dwpt_to_rhum
+from jasper.convert import ms_to_kmh_array, temp_dwpt_to_rhum_array
 from jasper.schema import hourly_global
 
 
@@ -119,13 +119,12 @@ for station in stations.to_dict(orient="records"):
             df["temp"] = df["temp"].div(10)
             df["dwpt"] = df["dwpt"].div(10)
             df["pres"] = df["pres"].div(10)
-            df["wspd"] = df["wspd"].div(10).apply(ms_to_kmh)
+            df["wspd"] = ms_to_kmh_array(df["wspd"].div(10))
             df["cldc"] = df["cldc"].apply(map_sky_code)
             df["prcp"] = df["prcp"].div(10)
 
             # Calculate humidity data
-            # pylint: disable=unnecessary-lambda
-            df["rhum"] = df.apply(lambda row: temp_dwpt_to_rhum(row), axis=1)
+            df["rhum"] = temp_dwpt_to_rhum_array(df["temp"], df["dwpt"])
 
             # Drop dew point column
             # pylint: disable=no-member
@@ -1,23 +1,57 @@
 """
 Get hourly METAR data from NOAA.
 
+Usage: metar_cycle.py [hours]
+
+Imports the cycle file of the given number of hours ago (default: 2).
+If [import] metar_store is set, ingested reports are remembered per
+cycle and only new reports are written. This allows importing the
+current cycle repeatedly (e.g. metar_cycle.py 0 every ten minutes).
+
 The code is licensed under the MIT license.
 """
 
-from typing import Union
+import os
+import sys
+import hashlib
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import current_process, get_context
+from typing import Iterator, Union
 from datetime import datetime, timedelta
 from urllib import request
+from urllib.error import HTTPError
+import numpy as np
 import pandas as pd
 from metar import Metar
 from jasper import Jasper
 from jasper.actions import persist
-from jasper.convert import temp_dwpt_to_rhum
+from jasper.convert import temp_dwpt_to_rhum_array
 from jasper.schema import hourly_metar
+from jasper.stations import station_map
 
 
 # Create Jasper instance
 jsp = Jasper("import.noaa.hourly.metar")
 
+# General configuration
+HOURS = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+COLUMNS = ("station", "time", "temp", "dwpt", "wdir", "wspd", "pres", "vsby", "coco")
+# Number of METAR strings per chunk
+CHUNK_SIZE = 1000
+# Number of processes for decoding METAR strings
+WORKERS = jsp.config.getint("import", "workers", fallback=os.cpu_count())
+# Only download the appended tail of a cycle file
+USE_RANGE = jsp.config.getboolean("import", "metar_range", fallback=False)
+# Location of the cycle files
+METAR_URL = jsp.config.get(
+    "import",
+    "metar_url",
+    fallback="https://tgftp.nws.noaa.gov/data/observations/metar/cycles",
+)
+# Number of days ingested reports are remembered
+RETENTION_DAYS = 2
+
 
 def get_condicode(weather: list) -> Union[int, None]:
     """
@@ -61,69 +95,206 @@ def get_condicode(weather: list) -> Union[int, None]:
         return None
 
 
-# Get ICAO stations
-stations = pd.read_sql(
-    "SELECT `id`, `icao` FROM `stations` WHERE `icao` IS NOT NULL", jsp.db()
-)
+def get_icao(line: str) -> Union[str, None]:
+    """
+    Get the station identifier of a METAR string without parsing it
+    """
+    tokens = line.split(None, 2)
+
+    # Skip report type
+    if tokens and tokens[0] in ("METAR", "SPECI"):
+        tokens = tokens[1:]
+
+    return tokens[0] if tokens else None
+
+
+def decode(lines: list) -> dict:
+    """
+    Decode METAR strings into column arrays (station column holds ICAO codes)
+    """
+    columns = {col: [] for col in COLUMNS}
+
+    for line in lines:
+        try:
+            # Parse METAR string
+            obs = Metar.Metar(line)
+
+            # pylint: disable=line-too-long
+            row = (
+                obs.station_id,
+                obs.time,
+                obs.temp.value("C") if obs.temp is not None else None,
+                obs.dewpt.value("C") if obs.dewpt is not None else None,
+                obs.wind_dir.value()
+                if (obs.wind_dir is not None and obs.wind_dir.value() > 0)
+                else None,
+                obs.wind_speed.value("KMH")
+                if (obs.wind_speed is not None and obs.wind_speed.value("KMH") > 0)
+                else None,
+                obs.press.value("HPA") if obs.press is not None else None,
+                obs.vis.value("M") if obs.vis is not None else None,
+                get_condicode(obs.weather) if obs.weather is not None else None,
+            )
+
+        except BaseException:
+            continue
+
+        for col, value in zip(COLUMNS, row):
+            columns[col].append(value)
+
+    return {
+        "station": np.array(columns["station"], dtype=object),
+        "time": np.array(columns["time"], dtype="datetime64[s]"),
+        **{col: np.array(columns[col], dtype=float) for col in COLUMNS[2:]},
+    }
+
+
+def process(chunks: Iterator[list]) -> Iterator[dict]:
+    """
+    Decode chunks of METAR strings in a process pool
+    """
+    # Pool workers (e.g. of jasper.scheduler) can't have child processes
+    if WORKERS < 2 or current_process().daemon:
+        for chunk in chunks:
+            yield decode(chunk)
+        return None
+
+    with ProcessPoolExecutor(WORKERS, mp_context=get_context("fork")) as executor:
+        yield from executor.map(decode, chunks)
+
+    return None
 
-stations = stations.set_index("icao")
+
+def get_store() -> Union[sqlite3.Connection, None]:
+    """
+    Local store of ingested METAR strings (hashes) & download offsets per cycle
+
+    Enabled by setting [import] metar_store to an SQLite file path
+    """
+    if not jsp.config.has_option("import", "metar_store"):
+        return None
+
+    store = sqlite3.connect(
+        os.path.expanduser(jsp.config.get("import", "metar_store")),
+        timeout=60,
+        isolation_level=None,
+    )
+    store.execute(
+        """
+        CREATE TABLE IF NOT EXISTS `reports` (
+            `cycle` TEXT NOT NULL,
+            `hash` BLOB NOT NULL,
+            PRIMARY KEY (`cycle`, `hash`)
+        ) WITHOUT ROWID
+        """
+    )
+    store.execute(
+        """
+        CREATE TABLE IF NOT EXISTS `cycles` (
+            `cycle` TEXT PRIMARY KEY,
+            `offset` INTEGER NOT NULL
+        )
+        """
+    )
+
+    return store
+
+
+def fetch(url: str, offset: int = 0) -> tuple:
+    """
+    Get the content of a cycle file from offset on
+
+    Returns the content & its position in the file. The whole file is
+    returned if the server ignores the range or the file has been replaced
+    since the last download (i.e. the offset isn't preceded by a line break).
+    """
+    req = request.Request(url)
+
+    # Include the previous byte to validate the offset
+    if offset > 0:
+        req.add_header("Range", f"bytes={offset - 1}-")
+
+    try:
+        with request.urlopen(req) as raw:
+            content = raw.read()
+            partial = raw.status == 206
+
+    except HTTPError as error:
+        # File is shorter than before
+        if error.code == 416:
+            return fetch(url)
+        raise
+
+    if not partial:
+        return content, 0
+
+    if content[:1] != b"\n":
+        return fetch(url)
+
+    return content[1:], offset
+
+
+# Get ICAO stations
+stations = {icao: station["id"] for icao, station in station_map(jsp, "icao").items()}
 
 # Get cycle
-cycle = (datetime.now() - timedelta(hours=2)).strftime("%H")
+date = datetime.now() - timedelta(hours=HOURS)
+cycle = date.strftime("%H")
+key = date.strftime("%Y%m%d%H")
 
-# Create request for JSON file
-url = f"https://tgftp.nws.noaa.gov/data/observations/metar/cycles/{cycle}Z.TXT"
-req = request.Request(url)
+# Get download offset
+store = get_store()
+offset = 0
+if store is not None and USE_RANGE:
+    result = store.execute(
+        "SELECT `offset` FROM `cycles` WHERE `cycle` = ?", (key,)
+    ).fetchone()
+    if result is not None:
+        offset = result[0]
 
 # Get METAR strings
-with request.urlopen(req) as raw:
-    file = raw.read().decode(errors="ignore").splitlines()
+content, start = fetch(f"{METAR_URL}/{cycle}Z.TXT", offset)
 
-data = []
+# Cut off incomplete last line (appended in a later download)
+if store is not None and USE_RANGE:
+    content = content[: content.rfind(b"\n") + 1]
+    offset = start + len(content)
 
-for line in file:
-    # Skip non-METAR lines
-    if not line[:2].isalpha():
-        continue
+file = content.decode(errors="ignore").splitlines()
 
-    try:
-        # Parse METAR string
-        obs = Metar.Metar(line)
+# Skip non-METAR lines & unknown stations
+lines = [line for line in file if line[:2].isalpha() and get_icao(line) in stations]
 
-        if obs.station_id in stations.index:
+# Skip reports which have been ingested already
+hashes = {}
+if store is not None:
+    hashes = {hashlib.sha1(line.strip().encode()).digest(): line for line in lines}
+    for (digest,) in store.execute(
+        "SELECT `hash` FROM `reports` WHERE `cycle` = ?", (key,)
+    ):
+        hashes.pop(digest, None)
+    lines = list(hashes.values())
 
-            # pylint: disable=line-too-long
-            data.append(
-                {
-                    "station": stations.loc[obs.station_id][0]
-                    if obs.station_id is not None
-                    else None,
-                    "time": obs.time,
-                    "temp": obs.temp.value("C") if obs.temp is not None else None,
-                    "dwpt": obs.dewpt.value("C") if obs.dewpt is not None else None,
-                    "wdir": obs.wind_dir.value()
-                    if (obs.wind_dir is not None and obs.wind_dir.value() > 0)
-                    else None,
-                    "wspd": obs.wind_speed.value("KMH")
-                    if (obs.wind_speed is not None and obs.wind_speed.value("KMH") > 0)
-                    else None,
-                    "pres": obs.press.value("HPA") if obs.press is not None else None,
-                    "vsby": obs.vis.value("M") if obs.vis is not None else None,
-                    "coco": get_condicode(obs.weather)
-                    if obs.weather is not None
-                    else None,
-                }
-            )
+# Decode chunks of METAR strings
+chunks = [lines[i : i + CHUNK_SIZE] for i in range(0, len(lines), CHUNK_SIZE)]
+columns = list(process(chunks))
 
-    except BaseException:
-        pass
+# Column arrays -> DataFrame
+df = pd.DataFrame(
+    {
+        col: np.concatenate([chunk[col] for chunk in columns])
+        if columns
+        else np.array([], dtype=object)
+        for col in COLUMNS
+    }
+)
 
-# List -> DataFrame
-df = pd.DataFrame.from_records(data)
+# Map ICAO codes to weather stations
+df["station"] = df["station"].map(stations)
+df = df.dropna(subset=["station"])
 
 # Calculate humidity data
-# pylint: disable=unnecessary-lambda
-df["rhum"] = df.apply(lambda row: temp_dwpt_to_rhum(row), axis=1)
+df["rhum"] = temp_dwpt_to_rhum_array(df["temp"], df["dwpt"])
 
 # Drop dew point column
 df = df.drop("dwpt", axis=1)
@@ -135,7 +306,24 @@ df = df.set_index(["station", "time"])
 df = df.round(1)
 
 # Write DataFrame into Meteostat database
-persist(jsp, df, hourly_metar)
+if len(df.index) > 0:
+    persist(jsp, df, hourly_metar)
+
+# Remember ingested reports & download offset
+if store is not None:
+    expired = (datetime.now() - timedelta(days=RETENTION_DAYS)).strftime("%Y%m%d%H")
+    store.execute("BEGIN")
+    store.executemany(
+        "INSERT OR IGNORE INTO `reports` (`cycle`, `hash`) VALUES (?, ?)",
+        ((key, digest) for digest in hashes),
+    )
+    store.execute(
+        "REPLACE INTO `cycles` (`cycle`, `offset`) VALUES (?, ?)", (key, offset)
+    )
+    store.execute("DELETE FROM `reports` WHERE `cycle` < ?", (expired,))
+    store.execute("DELETE FROM `cycles` WHERE `cycle` < ?", (expired,))
+    store.execute("COMMIT")
+    store.close()
 
 # Close Jasper instance
 jsp.close()
@@ -0,0 +1,27 @@
+"""
+Remove old changelog entries
+
+The code is licensed under the MIT license.
+"""
+
+from jasper import Jasper
+
+
+# General configuration
+RETENTION_DAYS = 30
+
+# Create Jasper instance
+jsp = Jasper("task.changelog.prune")
+
+jsp.query(
+    """
+    DELETE FROM
+        `changelog`
+    WHERE
+        `created` < NOW() - INTERVAL :days DAY
+    """,
+    {"days": RETENTION_DAYS},
+)
+
+# Close Jasper instance
+jsp.close()
@@ -4,136 +4,84 @@ Update hourly inventory
 The code is licensed under the MIT license.
 """
 
+from sys import argv
 from jasper import Jasper
+from jasper.helpers import (
+    extend_range,
+    get_changelog,
+    get_changelog_head,
+    merge_ranges,
+    update_inventory,
+    update_legacy_inventory,
+)
+
+
+# Task mode
+# 'full' (default) or 'changes'
+MODE = argv[1] if len(argv) > 1 else "full"
 
+# General configuration
+# Inventory mode per table
+TABLES = {
+    "hourly_synop": "H",
+    "hourly_metar": "H",
+    "hourly_national": "H",
+    "hourly_isd": "H",
+    "hourly_model": "P",
+}
 
 # Create Jasper instance
 jsp = Jasper("task.inventory.hourly")
 
-jsp.query(
-    """
-    INSERT INTO
-        `inventory`(`station`, `mode`, `start`)
-    SELECT
-        `station`,
-        'H' AS `mode`,
-        MIN(`mindate`) AS `start` FROM (
-            (SELECT
-                `station`,
-                DATE(MIN(`time`)) as `mindate`
-            FROM `hourly_synop`
-            GROUP BY `station`)
-        UNION ALL
-            (SELECT
-                `station`,
-                DATE(MIN(`time`)) as `mindate`
-            FROM `hourly_metar`
-            GROUP BY `station`)
-        UNION ALL
-            (SELECT
-                `station`,
-                DATE(MIN(`time`)) as `mindate`
-            FROM `hourly_national`
-            GROUP BY `station`)
-        UNION ALL
-            (SELECT
-                `station`,
-                DATE(MIN(`time`)) as `mindate`
-            FROM `hourly_isd`
-            GROUP BY `station`)
-        ) AS `hourly_inventory`
-    GROUP BY `station`
-    ON DUPLICATE KEY UPDATE
-        `start` = VALUES(`start`)
-"""
-)
+# Track the changelog if enabled
+track_changes = jsp.config.getboolean("db", "track_changes", fallback=False)
 
-jsp.query(
-    """
-    INSERT INTO
-        `inventory`(`station`, `mode`, `start`)
-    SELECT
-        `station`,
-        'P' AS `mode`,
-        MIN(`mindate`) AS `start` FROM (
-            (SELECT
-                `station`,
-                DATE(MIN(`time`)) as `mindate`
-            FROM `hourly_model`
-            GROUP BY `station`)
-        ) AS `model_inventory`
-    GROUP BY `station`
-    ON DUPLICATE KEY UPDATE
-        `start` = VALUES(`start`)
-"""
-)
+# Start & end date per mode and station
+inventory = {mode: {} for mode in set(TABLES.values())}
 
-jsp.query(
-    """
-    INSERT INTO
-        `inventory`(`station`, `mode`, `end`)
-    SELECT
-        `station`,
-        'H' AS `mode`,
-        MAX(`maxdate`) AS `end` FROM (
-            (SELECT
-                `station`,
-                DATE(MAX(`time`)) as `maxdate`
-            FROM `hourly_synop`
-            GROUP BY `station`)
-        UNION ALL
-            (SELECT
-                `station`,
-                DATE(MAX(`time`)) as `maxdate`
-            FROM `hourly_metar`
-            GROUP BY `station`)
-        UNION ALL
-            (SELECT
-                `station`,
-                DATE(MAX(`time`)) as `maxdate`
-            FROM `hourly_national`
-            GROUP BY `station`)
-        UNION ALL
-            (SELECT
-                `station`,
-                DATE(MAX(`time`)) as `maxdate`
-            FROM `hourly_isd`
-            GROUP BY `station`)
-        ) AS `hourly_inventory`
-    GROUP BY `station`
-    ON DUPLICATE KEY UPDATE
-        `end` = VALUES(`end`)
-"""
-)
+if MODE == "changes":
+    # Widen the inventory by all changes since the last run
+    # Requires [db] track_changes, the 'full' mode reconciles everything else
+    entries, state = get_changelog(jsp, jsp.get_var("changelog_cursor"), list(TABLES))
 
-jsp.query(
-    """
-    INSERT INTO
-        `inventory`(`station`, `mode`, `end`)
-    SELECT
-        `station`,
-        'P' AS `mode`,
-        MAX(`maxdate`) AS `end` FROM (
+    for _, table, station, start, end in entries:
+        extend_range(inventory[TABLES[table]], station, start.date(), end.date())
+else:
+    # Changes logged from here on are picked up by the next 'changes' run
+    if track_changes:
+        state = get_changelog_head(jsp)
+
+    # Scan each table once for start & end dates
+    result = jsp.query(
+        " UNION ALL ".join(
+            f"""
             (SELECT
                 `station`,
-                DATE(MAX(`time`)) as `maxdate`
-            FROM `hourly_model`
+                '{mode}' AS `mode`,
+                DATE(MIN(`time`)) AS `mindate`,
+                DATE(MAX(`time`)) AS `maxdate`
+            FROM `{table}`
             GROUP BY `station`)
-        ) AS `model_inventory`
-    GROUP BY `station`
-    ON DUPLICATE KEY UPDATE
-        `end` = VALUES(`end`)
-"""
-)
+            """
+            for table, mode in TABLES.items()
+        )
+    )
+
+    for station, mode, start, end in result.fetchall():
+        extend_range(inventory[mode], station, start, end)
+
+# Update inventory
+for mode, ranges in inventory.items():
+    update_inventory(jsp, ranges, mode, widen=MODE == "changes")
 
 # Legacy
-# pylint: disable=line-too-long
-jsp.query(
-    "INSERT INTO `stations_inventory`(`station`, `hourly_start`) SELECT `station`, MIN(`mindate`) AS `hourly_start` FROM ((SELECT `station`,DATE(MIN(`time`)) as `mindate` FROM `hourly_model` GROUP BY `station`) UNION ALL (SELECT `station`,DATE(MIN(`time`)) as `mindate` FROM `hourly_metar` GROUP BY `station`) UNION ALL (SELECT `station`,DATE(MIN(`time`)) as `mindate` FROM `hourly_synop` GROUP BY `station`) UNION ALL (SELECT `station`,DATE(MIN(`time`)) as `mindate` FROM `hourly_national` GROUP BY `station`) UNION ALL (SELECT `station`,DATE(MIN(`time`)) as `mindate` FROM `hourly_isd` GROUP BY `station`)) AS `hourly_inventory` GROUP BY `station` ON DUPLICATE KEY UPDATE `hourly_start` = VALUES(`hourly_start`)"
-)
-jsp.query(
-    "INSERT INTO `stations_inventory`(`station`, `hourly_end`) SELECT `station`, MAX(`maxdate`) AS `hourly_end` FROM ((SELECT `station`,DATE(MAX(`time`)) as `maxdate` FROM `hourly_model` GROUP BY `station`) UNION ALL (SELECT `station`,DATE(MAX(`time`)) as `maxdate` FROM `hourly_metar` GROUP BY `station`) UNION ALL (SELECT `station`,DATE(MAX(`time`)) as `maxdate` FROM `hourly_synop` GROUP BY `station`) UNION ALL (SELECT `station`,DATE(MAX(`time`)) as `maxdate` FROM `hourly_national` GROUP BY `station`) UNION ALL (SELECT `station`,DATE(MAX(`time`)) as `maxdate` FROM `hourly_isd` GROUP BY `station`)) AS `hourly_inventory` GROUP BY `station` ON DUPLICATE KEY UPDATE `hourly_end` = VALUES(`hourly_end`)"
+update_legacy_inventory(
+    jsp, merge_ranges(*inventory.values()), "hourly", widen=MODE == "changes"
 )
 
+# Store changelog cursor once the inventory is up to date
+if MODE == "changes" or track_changes:
+    jsp.set_var("changelog_cursor", state)
+
 # Close Jasper instance
 jsp.close()
@@ -4,56 +4,56 @@ Update monthly inventory
 The code is licensed under the MIT license.
 """
 
-from meteostat import Monthly
 from jasper import Jasper
-from jasper.helpers import get_stations
+from jasper.helpers import extend_range, get_stations, query_stations, update_inventory
 
 
 # General configuration
-Monthly.max_age = 0
-STATIONS_PER_CYCLE = 10
+STATIONS_PER_CYCLE = 2000
 
 # Create Jasper instance
 jsp = Jasper("task.inventory.monthly")
 
-stations = get_stations(
-    jsp,
-    "SELECT `id` FROM `stations`",
-    STATIONS_PER_CYCLE,
-)
+# Get stations
+stations = [
+    station[0]
+    for station in get_stations(jsp, "SELECT `id` FROM `stations`", STATIONS_PER_CYCLE)
+]
 
 if len(stations) > 0:
-    for station in stations:
-        try:
-            # Get monthly data from Meteostat
-            data = Monthly(station[0], model=False).fetch()
-
-            # Get start & end dates of time series
-            start = data.index.min().strftime("%Y-%m-%d")
-            end = data.index.max().strftime("%Y-%m-%d")
-
-            if len(start) == 10 and len(end) == 10:
-                jsp.query(
-                    f"""
-                    INSERT INTO `inventory`(
-                        `station`,
-                        `mode`,
-                        `start`,
-                        `end`
-                    ) VALUES (
-                        "{station[0]}",
-                        "M",
-                        "{start}",
-                        "{end}"
-                    )
-                    ON DUPLICATE KEY UPDATE
-                        `start` = VALUES(`start`),
-                        `end` = VALUES(`end`)
-                """
-                )
-
-        except BaseException:
-            pass
+    # Start & end months of the monthly table and the daily inventory
+    result = query_stations(
+        jsp,
+        """
+        (SELECT
+            `station`,
+            MIN(MAKEDATE(`year`, 1) + INTERVAL (`month` - 1) MONTH) AS `mindate`,
+            MAX(MAKEDATE(`year`, 1) + INTERVAL (`month` - 1) MONTH) AS `maxdate`
+        FROM `monthly_global`
+        WHERE `station` IN :stations
+        GROUP BY `station`)
+        UNION ALL
+        (SELECT
+            `station`,
+            `start` AS `mindate`,
+            `end` AS `maxdate`
+        FROM `inventory`
+        WHERE
+            `mode` = 'D' AND
+            `start` IS NOT NULL AND
+            `end` IS NOT NULL AND
+            `station` IN :stations)
+        """,
+        stations,
+    )
+
+    # Monthly data is aggregated from daily data, too
+    inventory = {}
+
+    for station, start, end in result:
+        extend_range(inventory, station, start.replace(day=1), end.replace(day=1))
+
+    update_inventory(jsp, inventory, "M")
 
 # Close Jasper instance
 jsp.close()
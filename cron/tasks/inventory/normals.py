@@ -4,58 +4,76 @@ Update normals inventory
 The code is licensed under the MIT license.
 """
 
-from meteostat import Normals
+from datetime import date, datetime
 from jasper import Jasper
-from jasper.helpers import get_stations
+from jasper.helpers import extend_range, get_stations, query_stations, update_inventory
 
 
 # General configuration
-Normals.max_age = 0
-STATIONS_PER_CYCLE = 10
+STATIONS_PER_CYCLE = 2000
+# Reference periods are calculated for each decade since 1990
+DECADES = range(1990, datetime.now().year, 10)
+# Minimum number of years with monthly data per reference period
+MIN_YEARS = 10
 
 # Create Jasper instance
 jsp = Jasper("task.inventory.normals")
 
-stations = get_stations(
-    jsp,
-    "SELECT `id` FROM `stations`",
-    STATIONS_PER_CYCLE,
-)
+# Get stations
+stations = [
+    station[0]
+    for station in get_stations(jsp, "SELECT `id` FROM `stations`", STATIONS_PER_CYCLE)
+]
 
 if len(stations) > 0:
-    for station in stations:
-        try:
-            # Get daily data from Meteostat
-            data = Normals(station[0], "all").fetch()
-
-            # Get start & end dates of time series
-            start = data.index.get_level_values("start").min()
-            end = data.index.get_level_values("end").max()
-            start = f"{start}-01-01"
-            end = f"{end}-12-31"
-
-            if len(start) == 10 and len(end) == 10:
-                jsp.query(
-                    f"""
-                    INSERT INTO `inventory`(
-                        `station`,
-                        `mode`,
-                        `start`,
-                        `end`
-                    ) VALUES (
-                        "{station[0]}",
-                        "N",
-                        "{start}",
-                        "{end}"
-                    )
-                    ON DUPLICATE KEY UPDATE
-                        `start` = VALUES(`start`),
-                        `end` = VALUES(`end`)
-                """
-                )
-
-        except BaseException:
-            pass
+    # Reference periods from the normals table and the monthly inventory
+    result = query_stations(
+        jsp,
+        """
+        (SELECT
+            `station`,
+            'normals' AS `source`,
+            MIN(`start`) AS `start`,
+            MAX(`end`) AS `end`
+        FROM `normals_global`
+        WHERE `station` IN :stations
+        GROUP BY `station`)
+        UNION ALL
+        (SELECT
+            `station`,
+            'monthly' AS `source`,
+            YEAR(`start`) AS `start`,
+            YEAR(`end`) AS `end`
+        FROM `inventory`
+        WHERE
+            `mode` = 'M' AND
+            `start` IS NOT NULL AND
+            `end` IS NOT NULL AND
+            `station` IN :stations)
+        """,
+        stations,
+    )
+
+    inventory = {}
+
+    for station, source, start, end in result:
+        if source == "normals":
+            extend_range(inventory, station, int(start), int(end))
+            continue
+
+        # Normals are calculated from monthly data (see export/bulk/stations/normals.py)
+        for year in DECADES:
+            if min(int(end), year) - max(int(start), year - 29) + 1 >= MIN_YEARS:
+                extend_range(inventory, station, year - 29, year)
+
+    update_inventory(
+        jsp,
+        {
+            station: (date(start, 1, 1), date(end, 12, 31))
+            for station, (start, end) in inventory.items()
+        },
+        "N",
+    )
 
 # Close Jasper instance
 jsp.close()
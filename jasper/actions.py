@@ -4,43 +4,75 @@ Jasper Export Tools
 The code is licensed under the MIT license.
 """
 
-import csv
+from functools import lru_cache
 from gzip import GzipFile
-from io import BytesIO, StringIO
+import hashlib
+from io import BytesIO
 import json
-import os
-from sqlalchemy import text
-import pandas as pd
+import re
+from shutil import copyfileobj
+from tempfile import SpooledTemporaryFile
+from typing import TYPE_CHECKING
 from .core import Jasper
-from .helpers import bulk_cd
+from .helpers import GzipCsvReader, bulk_store
 
+# Pandas & SQLAlchemy are only needed for persist()
+if TYPE_CHECKING:
+    import pandas as pd
 
-def export_csv(jsp: Jasper, data: list, filename: str) -> None:
+# Bytes of a gzipped export kept in memory while computing its digest
+SPOOL_SIZE = 16 * 1024**2
+
+
+def _upload(jsp: Jasper, filename: str, file, digest: str = None) -> None:
+    """
+    Upload a file to Meteostat Bulk unless its digest matches the manifest
+    """
+    # Skip unchanged files
+    if digest and jsp.get_digest(filename) == digest:
+        jsp.stats["uploads_skipped"] += 1
+        return None
+
+    # Upload in the background (see Jasper.wait_uploads)
+    if jsp.uploader():
+        jsp.uploader().submit(filename, file, digest)
+        return None
+
+    bulk_store(jsp.bulk(), filename, file)
+    jsp.stats["uploads"] += 1
+
+    # Remember digest
+    if digest:
+        jsp.set_digest(filename, digest)
+
+    return None
+
+
+def export_csv(jsp: Jasper, data: list, filename: str, chunk_size: int = 1000) -> None:
     """
     Store data in CSV format on Meteostat Bulk
+
+    Rows are gzipped in chunks of chunk_size while uploading. If the
+    manifest is enabled, the gzipped file is spooled first to get
+    its content digest.
     """
     # Print to console and abort if in dev mode
     if jsp.dev_mode:
         print(data)
         return None
 
-    # Create a file
-    file = BytesIO()
+    reader = GzipCsvReader(data, chunk_size)
 
-    # Write gzipped CSV data
-    if len(data) > 0:
-        with GzipFile(fileobj=file, mode="w") as gz:
-            output = StringIO()
-            writer = csv.writer(output, delimiter=",")
-            writer.writerows(data)
-            gz.write(output.getvalue().encode())
-            gz.close()
-            file.seek(0)
+    if not jsp.manifest():
+        _upload(jsp, filename, reader)
+        return None
 
-    # Change into directory
-    bulk_cd(jsp.bulk(), os.path.dirname(os.path.abspath(filename)))
-    # Store file
-    jsp.bulk().storbinary(f"STOR {filename}", file)
+    # Format & compress once, spooling to disk beyond SPOOL_SIZE
+    file = SpooledTemporaryFile(SPOOL_SIZE)
+    copyfileobj(reader, file)
+    file.seek(0)
+
+    _upload(jsp, filename, file, reader.digest.hexdigest())
 
 
 def export_json(jsp: Jasper, data: list, filename: str) -> None:
@@ -56,28 +88,145 @@ def export_json(jsp: Jasper, data: list, filename: str) -> None:
     file = BytesIO()
 
     # Write gzipped JSON data
+    content = b""
     if len(data) > 0:
+        content = json.dumps(data, indent=4, default=str, ensure_ascii=False).encode()
         with GzipFile(fileobj=file, mode="w") as gz:
-            gz.write(
-                json.dumps(data, indent=4, default=str, ensure_ascii=False).encode()
-            )
+            gz.write(content)
             gz.close()
             file.seek(0)
 
-    # Change into directory
-    bulk_cd(jsp.bulk(), os.path.dirname(os.path.abspath(filename)))
-    # Store file
-    jsp.bulk().storbinary(f"STOR {filename}", file)
+    _upload(jsp, filename, file, hashlib.sha1(content).hexdigest())
 
 
-def persist(jsp: Jasper, data: pd.DataFrame, schema: dict) -> None:
+def _split_assignments(clause: str) -> list:
+    """
+    Split a SET clause into its assignments, ignoring commas in parentheses
+    """
+    assignments = []
+    depth = 0
+    start = 0
+
+    for pos, char in enumerate(clause):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            assignments.append(clause[start:pos].strip())
+            start = pos + 1
+
+    assignments.append(clause[start:].strip())
+
+    return assignments
+
+
+@lru_cache(maxsize=None)
+def _batch_query(query: str, rows: int) -> str:
+    """
+    Turn an INSERT ... SET ... ON DUPLICATE KEY UPDATE query
+    into a multi-row INSERT ... VALUES statement
+
+    Parameters of the n-th row are suffixed with _n
+    """
+    match = re.match(
+        r"\s*(INSERT\s.*?INTO\s+\S+)\s+SET\s+(.*?)\s+(ON DUPLICATE KEY UPDATE\s.*)$",
+        query,
+        re.S | re.I,
+    )
+
+    if match is None:
+        raise ValueError("Import query cannot be batched")
+
+    insert, assignments, update = match.groups()
+
+    columns = []
+    values = []
+
+    for assignment in _split_assignments(assignments):
+        column, value = assignment.split("=", 1)
+        columns.append(column.strip())
+        values.append(value.strip())
+
+    values = ", ".join(values)
+    rows = ", ".join(
+        "(" + re.sub(r"(?<!:):(\w+)", rf":\1_{row}", values) + ")"
+        for row in range(rows)
+    )
+
+    return f"{insert} ({', '.join(columns)}) VALUES {rows} {update}"
+
+
+def _log_changes(con, query: str, records: list) -> None:
+    """
+    Append the time range affected per station to the changelog
+
+    See resources/sql/changelog.sql
+    """
+    # pylint: disable=import-outside-toplevel
+    from sqlalchemy import text
+
+    table = re.search(r"INTO\s+`?(\w+)`?", query, re.I).group(1)
+    changes = {}
+
+    for record in records:
+        if record.get("time") is not None:
+            time = str(record["time"])
+        elif record.get("year") is not None:
+            time = f"{record['year']}-{int(record.get('month') or 1):02d}-01"
+        else:
+            continue
+
+        if record.get("station") is not None:
+            # ISO formatted times can be compared as strings
+            start, end = changes.get(record["station"], (time, time))
+            changes[record["station"]] = (min(start, time), max(end, time))
+
+    if not changes:
+        return None
+
+    payload = {"table": table}
+    for row, (station, (start, end)) in enumerate(changes.items()):
+        payload[f"station_{row}"] = station
+        payload[f"start_{row}"] = start
+        payload[f"end_{row}"] = end
+
+    con.execute(
+        text(
+            """
+            INSERT INTO `changelog` (`table`, `station`, `start`, `end`, `created`)
+            VALUES """
+            + ", ".join(
+                f"(:table, :station_{row}, :start_{row}, :end_{row}, NOW(6))"
+                for row in range(len(changes))
+            )
+        ),
+        payload,
+    )
+
+    return None
+
+
+def persist(
+    jsp: Jasper, data: "pd.DataFrame", schema: dict, batch_size: int = None
+) -> None:
     """
     Import a Pandas DataFrame into the Meteostat DB
+
+    Records are written in multi-row batches of batch_size rows
+    (see [db] batch_size in config.ini). If [db] track_changes is
+    enabled, the affected time range per station is appended to the
+    changelog (see jasper.helpers.get_changelog).
     """
+    # pylint: disable=import-outside-toplevel
+    import pandas as pd
+    from sqlalchemy import text
+    from .validation import validate
+
     # Validations
     for parameter, validation in schema["validation"].items():
         if parameter in data.columns:
-            data[parameter] = data[parameter].apply(validation)
+            data[parameter] = validate(data[parameter], validation)
 
     # NaN to None
     data = data.where(pd.notnull(data), None)
@@ -93,6 +242,23 @@ def persist(jsp: Jasper, data: pd.DataFrame, schema: dict) -> None:
         print(data)
         return None
 
+    # Number of records per statement
+    if batch_size is None:
+        batch_size = jsp.config.getint("db", "batch_size", fallback=1000)
+
+    records = data.reset_index().to_dict(orient="records")
+
     with jsp.db().begin() as con:
-        for record in data.reset_index().to_dict(orient="records"):
-            con.execute(text(schema["import_query"]), {**schema["template"], **record})
+        for offset in range(0, len(records), batch_size):
+            batch = records[offset : offset + batch_size]
+            payload = {}
+
+            for row, record in enumerate(batch):
+                for key, value in {**schema["template"], **record}.items():
+                    payload[f"{key}_{row}"] = value
+
+            con.execute(text(_batch_query(schema["import_query"], len(batch))), payload)
+
+        # Log changes in the same transaction
+        if jsp.config.getboolean("db", "track_changes", fallback=False):
+            _log_changes(con, schema["import_query"], records)
@@ -6,7 +6,9 @@ The code is licensed under the MIT license.
 """
 
 import math
+import numpy as np
 from numpy import isnan
+import pandas as pd
 
 
 def kelvin_to_celsius(value):
@@ -83,3 +85,83 @@ def jcm2_to_wm2(value):
     Convert Joule/CM^2 to Watt/M^2
     """
     return round(value * 2.78) if value is not None and not isnan(value) else None
+
+
+def _to_float(values):
+    """
+    Cast a Pandas Series or array-like to float (None becomes NaN)
+    """
+    if isinstance(values, pd.Series):
+        return values.astype(float)
+    return np.asarray(values, dtype=float)
+
+
+def kelvin_to_celsius_array(values):
+    """
+    Convert Kelvin to Celsius (vectorized)
+    """
+    return _to_float(values) - 273.15
+
+
+def ms_to_kmh_array(values):
+    """
+    Convert m/s to km/h (vectorized)
+    """
+    return _to_float(values) * 3.6
+
+
+def temp_dwpt_to_rhum_array(temp, dwpt):
+    """
+    Get relative humidity from temperature and dew point columns (vectorized)
+    """
+    temp = _to_float(temp)
+    dwpt = _to_float(dwpt)
+
+    with np.errstate(all="ignore"):
+        return 100 * (
+            np.exp((17.625 * dwpt) / (243.04 + dwpt))
+            / np.exp((17.625 * temp) / (243.04 + temp))
+        )
+
+
+def pres_to_msl_array(pres, temp, altitude: int = None):
+    """
+    Convert local air pressure columns to MSL (vectorized)
+    """
+    pres = _to_float(pres)
+    temp = _to_float(temp)
+
+    # Without altitude there's nothing to convert
+    if altitude is None or (np.ndim(altitude) == 0 and isnan(altitude)):
+        return pres * np.nan
+
+    altitude = _to_float(altitude)
+
+    with np.errstate(all="ignore"):
+        msl = np.round(
+            pres
+            * np.power(
+                1 - ((0.0065 * altitude) / (temp + 0.0065 * altitude + 273.15)),
+                -5.257,
+            ),
+            1,
+        )
+
+    # Remove missing (-999) and invalid results
+    msl[(pres == -999) | ~np.isfinite(msl)] = np.nan
+
+    return msl
+
+
+def percentage_to_okta_array(values):
+    """
+    Convert cloud cover percentage to oktas (vectorized)
+    """
+    return np.round(_to_float(values) / 12.5)
+
+
+def jcm2_to_wm2_array(values):
+    """
+    Convert Joule/CM^2 to Watt/M^2 (vectorized)
+    """
+    return np.round(_to_float(values) * 2.78)
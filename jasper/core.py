@@ -4,11 +4,18 @@ Jasper Core Class
 The code is licensed under the MIT license.
 """
 
-from typing import Union
+from collections import Counter
+from typing import TYPE_CHECKING, Union
+import json
 import os
-from ftplib import FTP
 from configparser import ConfigParser
-from sqlalchemy import create_engine, text, engine
+
+# Heavy dependencies are imported on first use
+if TYPE_CHECKING:
+    from ftplib import FTP
+    from sqlite3 import Connection
+    from .helpers import BulkUploader
+    from sqlalchemy.engine import Engine
 
 
 class Jasper:
@@ -37,25 +44,86 @@ class Jasper:
     # Meteostat database connection
     _db = None
 
+    # Meteostat database connection reused across queries
+    _con = None
+
     # Bulk FTP connection
     _bulk = None
 
-    def _connect_sys(self) -> None:
+    # Background uploads to Meteostat Bulk
+    _uploader = None
+
+    # Local manifest of uploaded bulk files
+    _manifest = None
+
+    # Counters (e.g. uploads & skipped uploads)
+    stats: Counter = None
+
+    # Keep engines alive between instances (used by the scheduler)
+    persistent = False
+
+    # Engines shared by all instances in persistent mode
+    _engines: dict = {}
+
+    def _create_engine(self, section: str) -> "Engine":
         """
-        Connect to Meteostat System DB
+        Create an SQLAlchemy engine for a DB config section
         """
-        self._sys_db = create_engine(
+        # pylint: disable=import-outside-toplevel
+        from sqlalchemy import create_engine
+
+        options = {}
+
+        # Connection pool settings
+        for option in ("pool_size", "max_overflow", "pool_recycle"):
+            if self.config.has_option(section, option):
+                options[option] = self.config.getint(section, option)
+        if self.config.has_option(section, "pool_pre_ping"):
+            options["pool_pre_ping"] = self.config.getboolean(section, "pool_pre_ping")
+
+        url = (
             "mysql+mysqlconnector://"
-            + self.config.get("sys_db", "user")
+            + self.config.get(section, "user")
             + ":"
-            + self.config.get("sys_db", "password")
+            + self.config.get(section, "password")
             + "@"
-            + self.config.get("sys_db", "host")
+            + self.config.get(section, "host")
             + "/"
-            + self.config.get("sys_db", "name")
+            + self.config.get(section, "name")
             + "?charset=utf8"
         )
 
+        if not self.persistent:
+            return create_engine(url, **options)
+
+        # Reuse engine of a previous instance
+        if url not in Jasper._engines:
+            Jasper._engines[url] = create_engine(url, **options)
+        return Jasper._engines[url]
+
+    def _same_server(self) -> bool:
+        """
+        Check if the system DB and the Meteostat DB share a server & user
+        """
+        return all(
+            self.config.get("sys_db", option) == self.config.get("db", option)
+            for option in ("host", "user", "password")
+        )
+
+    def sys_db(self) -> "Engine":
+        """
+        Meteostat System DB connection
+        """
+        if not self._sys_db:
+            if (
+                self.config.getboolean("sys_db", "share_engine", fallback=False)
+                and self._same_server()
+            ):
+                self._sys_db = self.db()
+            else:
+                self._sys_db = self._create_engine("sys_db")
+        return self._sys_db
+
     def __init__(self, name: str, dev: bool = False) -> None:
         """
         Initialize Jasper
@@ -64,17 +132,20 @@ class Jasper:
         self.name = name
         self.dev_mode = dev
 
+        # Reset counters
+        self.stats = Counter()
+
         # Configuration file
         self.config = ConfigParser()
         self.config.read(self._config_path)
 
-        # Connect to system DB
-        self._connect_sys()
-
-    def bulk(self) -> FTP:
+    def bulk(self) -> "FTP":
         """
         Meteostat Bulk FTP server connection
         """
+        # pylint: disable=import-outside-toplevel
+        from ftplib import FTP
+
         if not self._bulk:
             self._bulk = FTP(self.config.get("bulk", "host"))
             self._bulk.login(
@@ -82,38 +153,140 @@ class Jasper:
             )
         return self._bulk
 
-    def db(self) -> engine:
+    def _connect_bulk(self) -> "FTP":
+        """
+        Open an additional Meteostat Bulk FTP server connection
+        """
+        # pylint: disable=import-outside-toplevel
+        from ftplib import FTP
+
+        bulk = FTP(self.config.get("bulk", "host"))
+        bulk.login(self.config.get("bulk", "user"), self.config.get("bulk", "password"))
+        return bulk
+
+    def uploader(self) -> Union["BulkUploader", None]:
+        """
+        Background uploader for Meteostat Bulk
+
+        Enabled by setting [bulk] connections to more than 1
+        """
+        # pylint: disable=import-outside-toplevel
+        from .helpers import BulkUploader
+
+        connections = self.config.getint("bulk", "connections", fallback=1)
+
+        if not self._uploader and connections > 1:
+            self._uploader = BulkUploader(
+                self._connect_bulk,
+                connections,
+                self.config.getint("bulk", "queue_size", fallback=4 * connections),
+            )
+        return self._uploader
+
+    def wait_uploads(self) -> None:
+        """
+        Wait for background uploads to finish
+
+        Raises a RuntimeError if any upload failed
+        """
+        if not self._uploader:
+            return None
+
+        uploader = self._uploader
+        self._uploader = None
+        errors = uploader.join()
+
+        for path, digest in uploader.uploaded:
+            self.stats["uploads"] += 1
+            if digest:
+                self.set_digest(path, digest)
+        self.stats["uploads_failed"] += len(errors)
+
+        # Report failed background uploads
+        if errors:
+            raise RuntimeError(
+                "Bulk uploads failed: "
+                + ", ".join(f"{path} ({error})" for path, error in errors.items())
+            )
+
+        return None
+
+    def manifest(self) -> Union["Connection", None]:
+        """
+        Local manifest of content digests per bulk file
+
+        Enabled by setting [bulk] manifest to an SQLite file path
+        """
+        # pylint: disable=import-outside-toplevel
+        import sqlite3
+
+        if not self._manifest and self.config.has_option("bulk", "manifest"):
+            self._manifest = sqlite3.connect(
+                os.path.expanduser(self.config.get("bulk", "manifest")),
+                timeout=60,
+                isolation_level=None,
+            )
+            self._manifest.execute(
+                """
+                CREATE TABLE IF NOT EXISTS `files` (
+                    `path` TEXT PRIMARY KEY,
+                    `digest` TEXT NOT NULL
+                )
+                """
+            )
+        return self._manifest
+
+    def get_digest(self, path: str) -> Union[str, None]:
+        """
+        Get the content digest of a bulk file from the manifest
+        """
+        if not self.manifest():
+            return None
+
+        result = (
+            self.manifest()
+            .execute("SELECT `digest` FROM `files` WHERE `path` = ?", (path,))
+            .fetchone()
+        )
+
+        return result[0] if result else None
+
+    def set_digest(self, path: str, digest: str) -> None:
+        """
+        Store the content digest of a bulk file in the manifest
+        """
+        if self.manifest():
+            self.manifest().execute(
+                "INSERT OR REPLACE INTO `files` (`path`, `digest`) VALUES (?, ?)",
+                (path, digest),
+            )
+
+    def db(self) -> "Engine":
         """
         Meteostat database connection
         """
         if not self._db:
-            self._db = create_engine(
-                "mysql+mysqlconnector://"
-                + self.config.get("db", "user")
-                + ":"
-                + self.config.get("db", "password")
-                + "@"
-                + self.config.get("db", "host")
-                + "/"
-                + self.config.get("db", "name")
-                + "?charset=utf8"
-            )
+            self._db = self._create_engine("db")
         return self._db
 
     def set_var(self, name: str, value: str) -> None:
         """
         Set a variable (scoped by task name)
         """
+        # pylint: disable=import-outside-toplevel
+        from sqlalchemy import text
+
         if self.dev_mode:
             return None
 
         payload = {"ctx": self.name, "name": name, "value": str(value)}
+        sys_db = self.config.get("sys_db", "name")
 
-        with self._sys_db.connect() as con:
+        with self.sys_db().connect() as con:
             con.execute(
                 text(
-                    """
-                    INSERT INTO `variables` (
+                    f"""
+                    INSERT INTO `{sys_db}`.`variables` (
                         `ctx`,
                         `name`,
                         `value`
@@ -134,16 +307,20 @@ class Jasper:
         """
         Retrieve a variable (scoped by task name)
         """
+        # pylint: disable=import-outside-toplevel
+        from sqlalchemy import text
+
         payload = {"ctx": self.name, "name": name}
+        sys_db = self.config.get("sys_db", "name")
 
-        with self._sys_db.connect() as con:
+        with self.sys_db().connect() as con:
             result = con.execute(
                 text(
-                    """
+                    f"""
                     SELECT
                         `value`
                     FROM
-                        `variables`
+                        `{sys_db}`.`variables`
                     WHERE
                         `ctx` = :ctx AND
                         `name` = :name
@@ -162,14 +339,47 @@ class Jasper:
         """
         Execute an SQL query on the Meteostat DB
         """
+        # pylint: disable=import-outside-toplevel
+        from sqlalchemy import text
+
+        statement = text(query).execution_options(autocommit=True)
+
+        # Keep a single connection open for all queries
+        if self.config.getboolean("db", "reuse_connection", fallback=False):
+            if self._con is None or self._con.closed:
+                # Commit each statement, so no transaction (snapshot &
+                # metadata locks) is held open between queries
+                self._con = (
+                    self.db().connect().execution_options(isolation_level="AUTOCOMMIT")
+                )
+            return self._con.execute(statement, payload)
+
         with self.db().connect() as con:
-            return con.execute(text(query).execution_options(autocommit=True), payload)
+            return con.execute(statement, payload)
 
     def close(self) -> None:
         """
         Close all connections
+
+        Raises a RuntimeError if any background upload failed
         """
-        if self._bulk:
-            self._bulk.quit()
-        if self._db:
-            self._db.dispose()
+        try:
+            self.wait_uploads()
+        finally:
+            # Store upload counters if uploads are skipped or run in background
+            if self.stats and (
+                self._manifest
+                or self.config.getint("bulk", "connections", fallback=1) > 1
+            ):
+                self.set_var("stats", json.dumps(self.stats))
+            if self._bulk:
+                self._bulk.quit()
+            if self._manifest:
+                self._manifest.close()
+            if self._con:
+                self._con.close()
+            if not self.persistent:
+                if self._sys_db and self._sys_db is not self._db:
+                    self._sys_db.dispose()
+                if self._db:
+                    self._db.dispose()
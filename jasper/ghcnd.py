@@ -4,10 +4,20 @@ Process GHCND data
 The code is licensed under the MIT license.
 """
 
-from io import StringIO
+from io import BytesIO
 from ftplib import FTP
+import numpy as np
 import pandas as pd
 
+# Characters per line of a .dly file
+DLY_LINE_LENGTH = 269
+# Characters of the line metadata (ID, year, month & element)
+DLY_METADATA_LENGTH = 21
+# Characters per day (value & three flags)
+DLY_DAY_LENGTH = 8
+# Zero-padded days of the month
+DLY_DAYS = np.array([f"{day:02d}" for day in range(1, 32)], dtype="S2")
+
 
 def connect_to_ftp():
     """
@@ -20,167 +30,105 @@ def connect_to_ftp():
     return ftp
 
 
-def get_flags(string: str):
+def _to_matrix(data: bytes) -> np.ndarray:
     """
-    Get flags, replacing empty flags with '_' for clarity (' S ' becomes '_S_')
+    Get the lines of a .dly file as a (lines, 269) byte matrix
     """
+    if not data.endswith(b"\n"):
+        data += b"\n"
+
+    # Fast path for files with fixed-width lines
+    for ending in (b"\n", b"\r\n"):
+        stride = DLY_LINE_LENGTH + len(ending)
+        if len(data) % stride == 0:
+            matrix = np.frombuffer(data, dtype="S1").reshape(-1, stride)
+            if (matrix[:, DLY_LINE_LENGTH:] == np.frombuffer(ending, "S1")).all():
+                return matrix[:, :DLY_LINE_LENGTH]
+
+    buffer = b"".join(
+        line.ljust(DLY_LINE_LENGTH)[:DLY_LINE_LENGTH]
+        for line in data.splitlines()
+        if line
+    )
 
-    m_flag = string.read(1)
-    m_flag = m_flag if m_flag.strip() else "_"
-    q_flag = string.read(1)
-    q_flag = q_flag if q_flag.strip() else "_"
-    s_flag = string.read(1)
-    s_flag = s_flag if s_flag.strip() else "_"
-
-    return [m_flag + q_flag + s_flag]
+    return np.frombuffer(buffer, dtype="S1").reshape(-1, DLY_LINE_LENGTH)
 
 
-def create_dataframe(element, dict_element):
+def parse_dly(data: bytes, station_id: str) -> pd.DataFrame:
     """
-    Make dataframes out of the dicts, make the indices date strings (YYYY-MM-DD)
-    """
-
-    element = element.upper()
-    df_element = pd.DataFrame(dict_element)
+    Convert the content of a .dly file to a DataFrame
 
-    # Add dates (YYYY-MM-DD) as index on df. Pad days with zeros to two places
-    df_element.index = (
-        df_element["YEAR"]
-        + "-"
-        + df_element["MONTH"]
-        + "-"
-        + df_element["DAY"].str.zfill(2)
+    The DataFrame holds one row per date of the first element in the file.
+    Each element is represented by a value column (e.g. TMAX) and a column
+    of its flags (e.g. TMAX_FLAGS, empty flags are replaced with '_').
+    """
+    matrix = _to_matrix(data)
+
+    if len(matrix) == 0:
+        raise ValueError(f"No data for station {station_id}")
+
+    # One row per line & day
+    days = matrix[:, DLY_METADATA_LENGTH:].reshape(-1, 31, DLY_DAY_LENGTH)
+    values = np.ascontiguousarray(days[:, :, :5]).view("S5")[:, :, 0]
+    flags = np.where(days[:, :, 5:] == b" ", b"_", days[:, :, 5:])
+    flags = np.ascontiguousarray(flags).view("S3")[:, :, 0]
+
+    # Date keys (YYYYMMDD) & strings (YYYY-MM-DD)
+    digits = matrix[:, 11:17].view(np.uint8).astype(np.int64) - ord("0")
+    keys = digits @ np.array([10**7, 10**6, 10**5, 10**4, 10**3, 10**2])
+    keys = keys[:, None] + np.arange(1, 32)
+    dates = np.empty((len(matrix), 31, 10), dtype="S1")
+    dates[:, :, 0:4] = matrix[:, None, 11:15]
+    dates[:, :, 4] = b"-"
+    dates[:, :, 5:7] = matrix[:, None, 15:17]
+    dates[:, :, 7] = b"-"
+    dates[:, :, 8:10] = DLY_DAYS.view("S1").reshape(31, 2)
+    dates = dates.view("S10")[:, :, 0]
+
+    # Elements in order of appearance
+    elements = np.ascontiguousarray(matrix[:, 17:21]).view("S4")[:, 0].astype(str)
+    codes, element_list = pd.factorize(elements)
+    valid = values != b"-9999"
+
+    # Rows are the dates of the first element
+    line, day = np.nonzero(valid & (codes == 0)[:, None])
+    index = pd.Index(dates[line, day].astype(str).astype(object), name="MM/DD/YYYY")
+    positions = pd.Index(keys[line, day])
+
+    df = pd.DataFrame(
+        {
+            "ID": np.full(len(index), station_id, dtype=object),
+            "YEAR": index.str[0:4].to_numpy(),
+            "MONTH": index.str[5:7].to_numpy(),
+            "DAY": (day + 1).astype(str).astype(object),
+        },
+        index=index,
     )
-    df_element.index.name = "DATE"
 
-    # Arrange columns so ID, YEAR, MONTH, DAY are at front. Leaving them in
-    # for plotting later - https://stackoverflow.com/a/31396042
-    for col in ["DAY", "MONTH", "YEAR", "ID"]:
-        df_element = move_col_to_front(col, df_element)
+    # Align the values & flags of each element by date
+    for code, element in enumerate(element_list):
+        line, day = np.nonzero(valid & (codes == code)[:, None])
+        target = positions.get_indexer(keys[line, day])
+        line, day, target = line[target >= 0], day[target >= 0], target[target >= 0]
 
-    # Convert numerical values to float
-    df_element.loc[:, element] = df_element.loc[:, element].astype(float)
+        column = np.full(len(index), np.nan)
+        column[target] = values[line, day].astype(float)
+        df[element] = column
 
-    return df_element
-
-
-def move_col_to_front(element, df):
-    """
-    Move DataFrame column to position 0
-    """
-
-    element = element.upper()
-    cols = df.columns.tolist()
-    cols.insert(0, cols.pop(cols.index(element)))
-    df = df.reindex(columns=cols)
+        column = np.full(len(index), np.nan, dtype=object)
+        column[target] = flags[line, day].astype(str).astype(object)
+        df[element + "_FLAGS"] = column
 
     return df
 
 
-# pylint: disable=too-many-locals
 def dly_to_df(ftp, station_id):
     """
     Convert .dly files to DataFrame
     """
 
-    ftp_filename = station_id + ".dly"
-
-    # Write .dly file to stream using StringIO using FTP command 'RETR'
-    stream = StringIO()
-    ftp.retrlines("RETR " + "/pub/data/ghcn/daily/all/" + ftp_filename, stream.write)
-
-    # Move to first char in file
-    stream.seek(0)
-
-    # File params
-    num_chars_line = 269
-    num_chars_metadata = 21
-
-    element_list = [
-        "TMAX",
-        "TMIN",
-        "TAVG",
-        "PRCP",
-        "SNWD",
-        "AWDR",
-        "AWND",
-        "TSUN",
-        "WSFG",
-        "ACMC",
-    ]
-
-    # Read through entire StringIO stream (the .dly file)
-    # and collect the data
-    all_dicts = {}
-    element_flag = {}
-    prev_year = "0000"
-    index = 0
-
-    while True:
-        index += 1
-
-        # Read metadata for each line
-        # (one month of data for a particular element per line)
-        id_station = stream.read(11)
-        year = stream.read(4)
-        month = stream.read(2)
-        day = 0
-        element = stream.read(4)
-
-        # If this is blank then we've reached EOF and should exit loop
-        if not element:
-            break
-
-        # Loop through each day in rest of row,
-        # break if current position is end of row
-        while stream.tell() % num_chars_line != 0:
-            day += 1
-            # Fill in contents of each dict depending on element type in
-            # current row
-            if day == 1:
-                try:
-                    first_hit = element_flag[element]
-                    pass
-                except BaseException:
-                    element_flag[element] = 1
-                    all_dicts[element] = {}
-                    all_dicts[element]["ID"] = []
-                    all_dicts[element]["YEAR"] = []
-                    all_dicts[element]["MONTH"] = []
-                    all_dicts[element]["DAY"] = []
-                    all_dicts[element][element.upper()] = []
-                    all_dicts[element][element.upper() + "_FLAGS"] = []
-
-            value = stream.read(5)
-            flags = get_flags(stream)
-            if value == "-9999":
-                continue
-            all_dicts[element]["ID"] += [station_id]
-            all_dicts[element]["YEAR"] += [year]
-            all_dicts[element]["MONTH"] += [month]
-            all_dicts[element]["DAY"] += [str(day)]
-            all_dicts[element][element.upper()] += [value]
-            all_dicts[element][element.upper() + "_FLAGS"] += flags
-
-    # Create dataframes from dict
-    all_dfs = {}
-    for element in list(all_dicts.keys()):
-        all_dfs[element] = create_dataframe(element, all_dicts[element])
-
-    # Combine all element dataframes into one dataframe,
-    # indexed on date.
-    #
-    # pd.concat automagically aligns values to matching indices, therefore the
-    # data is date aligned!
-    list_dfs = []
-    for df in list(all_dfs.keys()):
-        list_dfs += [all_dfs[df]]
-    df_all = pd.concat(list_dfs, axis=1, sort=False)
-    df_all.index.name = "MM/DD/YYYY"
-
-    # Remove duplicated/broken columns and rows
-    # https://stackoverflow.com/a/40435354
-    df_all = df_all.loc[:, ~df_all.columns.duplicated()]
-    df_all = df_all.loc[df_all["ID"].notnull(), :]
-
-    return df_all
+    # Write .dly file to stream using FTP command 'RETR'
+    stream = BytesIO()
+    ftp.retrbinary(f"RETR /pub/data/ghcn/daily/all/{station_id}.dly", stream.write)
+
+    return parse_dly(stream.getvalue(), station_id)
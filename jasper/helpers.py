@@ -4,11 +4,33 @@ Jasper Helpers
 The code is licensed under the MIT license.
 """
 
-from ftplib import FTP
+from contextlib import contextmanager
+from functools import lru_cache
+import csv
+import hashlib
+from io import StringIO
+from itertools import groupby, islice
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator
+import json
 import os, sys
-from sqlalchemy import text
+from queue import Queue
+from tempfile import SpooledTemporaryFile, gettempdir
+from threading import Lock, Thread, local
+import time
+from weakref import WeakKeyDictionary
+from zipfile import ZipFile
+import zlib
 from .core import Jasper
 
+if TYPE_CHECKING:
+    from ftplib import FTP
+
+# Known directories & working directory per FTP connection
+_bulk_dirs = WeakKeyDictionary()
+
+# FTP directory listings (time & file names) per host and path
+_listings = {}
+
 
 def read_file(path: str, relative=True) -> None:
     """
@@ -21,29 +43,784 @@ def read_file(path: str, relative=True) -> None:
         return sql.read()
 
 
-def bulk_cd(bulk: FTP, path: str) -> None:
+def csv_chunks(rows: Iterable, chunk_size: int = 1000) -> Iterator[bytes]:
+    """
+    Format rows as encoded CSV, chunk_size rows at a time
+    """
+    rows = iter(rows)
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        output = StringIO()
+        writer = csv.writer(output, delimiter=",")
+        writer.writerows(chunk)
+        yield output.getvalue().encode()
+
+
+class GzipCsvReader:
+    """
+    Read-only file-like object which yields gzipped CSV data
+
+    Rows are formatted and compressed in chunks as the consumer
+    reads, so memory usage is bounded by the chunk size. The SHA-1
+    digest of the uncompressed CSV is complete once everything is read.
+    """
+
+    def __init__(self, rows: Iterable, chunk_size: int = 1000) -> None:
+        self._chunks = csv_chunks(rows, chunk_size)
+        self.digest = hashlib.sha1()
+        # Gzip container, same compression level as GzipFile
+        self._compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+        self._buffer = bytearray()
+        self._started = False
+        self._finished = False
+
+    def _fill(self) -> None:
+        """
+        Compress the next chunk of rows into the buffer
+        """
+        chunk = next(self._chunks, None)
+
+        if chunk is not None:
+            self.digest.update(chunk)
+            self._buffer += self._compressor.compress(chunk)
+            self._started = True
+        else:
+            # Empty data results in an empty file
+            if self._started:
+                self._buffer += self._compressor.flush()
+            self._finished = True
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Read up to size bytes (everything if size is negative)
+        """
+        while not self._finished and (size < 0 or len(self._buffer) < size):
+            self._fill()
+
+        if size < 0:
+            size = len(self._buffer)
+
+        chunk = bytes(self._buffer[:size])
+        del self._buffer[:size]
+
+        return chunk
+
+
+def bulk_cd(bulk: "FTP", path: str) -> None:
     """
     Change into directory path and create missing directories
+
+    Known directories are cached per connection, so changing
+    into a known path costs one round trip at most.
     """
-    # Go to root directory
-    bulk.cwd("/")
+    cache = _bulk_dirs.setdefault(bulk, {"cwd": None, "dirs": set()})
 
     # Create directory tree
-    directories = list(filter(None, path.split("/")))
+    directories = list(filter(None, str(path).split("/")))
+    path = "/" + "/".join(directories)
+
+    # Already there
+    if cache["cwd"] == path:
+        return None
+
+    # Change into known directory
+    if path in cache["dirs"]:
+        try:
+            bulk.cwd(path)
+            cache["cwd"] = path
+            return None
+        except BaseException:
+            bulk_cd_invalidate(bulk)
+            cache = _bulk_dirs.setdefault(bulk, {"cwd": None, "dirs": set()})
+
+    # Start at the deepest known parent directory
+    start = 0
+    for depth in range(len(directories) - 1, 0, -1):
+        if "/" + "/".join(directories[:depth]) in cache["dirs"]:
+            start = depth
+            break
+    parent = "/" + "/".join(directories[:start])
+
+    if cache["cwd"] != parent:
+        cache["cwd"] = None
+        bulk.cwd(parent)
+        cache["cwd"] = parent
+    current = parent.rstrip("/")
 
     # Process directory tree
-    for directory in directories:
+    for directory in directories[start:]:
+        current += "/" + directory
         try:
             bulk.cwd(str(directory))
         except BaseException:
             bulk.mkd(str(directory))
             bulk.cwd(str(directory))
+        cache["dirs"].add(current)
+        cache["cwd"] = current
+
+    return None
+
+
+def bulk_cd_invalidate(bulk: "FTP") -> None:
+    """
+    Forget known directories of a connection (e.g. after an FTP error)
+    """
+    _bulk_dirs.pop(bulk, None)
+
+
+def bulk_store(bulk: "FTP", filename: str, file, blocksize: int = 8192) -> None:
+    """
+    Store a file on Meteostat Bulk, creating missing directories
+
+    Only a rejected STOR command is retried. Once the transfer has
+    started, the file can't be rewound (e.g. a GzipCsvReader), so
+    errors are raised.
+    """
+    # pylint: disable=import-outside-toplevel
+    from ftplib import error_perm
+
+    path = os.path.dirname(os.path.abspath(filename))
+
+    # Change into directory
+    bulk_cd(bulk, path)
+    bulk.voidcmd("TYPE I")
+
+    # Start transfer
+    try:
+        conn = bulk.transfercmd(f"STOR {filename}")
+    except error_perm:
+        # The directory cache may be stale, retry once (nothing sent yet)
+        bulk_cd_invalidate(bulk)
+        bulk_cd(bulk, path)
+        conn = bulk.transfercmd(f"STOR {filename}")
+
+    # Store file
+    with conn:
+        while True:
+            block = file.read(blocksize)
+            if not block:
+                break
+            conn.sendall(block)
+
+    bulk.voidresp()
+
+
+def ftp_listing(jsp: Jasper, ftp: "FTP", path: str) -> list:
+    """
+    Get the file names of an FTP directory
+
+    Listings are cached for [ftp] listing_ttl seconds. If [ftp]
+    listing_cache is set, they are stored on disk and shared across runs.
+    """
+    key = f"{ftp.host}:{path}"
+    ttl = jsp.config.getint("ftp", "listing_ttl", fallback=3600)
+    now = time.time()
+
+    # Listing of the current run
+    if key in _listings and now - _listings[key][0] < ttl:
+        return _listings[key][1]
+
+    # Listing of a previous run
+    cache = jsp.config.get("ftp", "listing_cache", fallback=None)
+    if cache:
+        cache = os.path.join(
+            os.path.expanduser(cache), hashlib.sha1(key.encode()).hexdigest() + ".json"
+        )
+        try:
+            with open(cache, "r", encoding="UTF-8") as file:
+                listing = json.load(file)
+            if now - listing["time"] < ttl:
+                _listings[key] = (listing["time"], listing["files"])
+                return listing["files"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    ftp.cwd(path)
+    files = ftp.nlst()
+    _listings[key] = (now, files)
+
+    if cache:
+        os.makedirs(os.path.dirname(cache), exist_ok=True)
+        # Replace atomically, other tasks might read the file
+        with open(f"{cache}.{os.getpid()}", "w", encoding="UTF-8") as file:
+            json.dump({"time": now, "files": files}, file)
+        os.replace(f"{cache}.{os.getpid()}", cache)
+
+    return files
+
+
+@contextmanager
+def ftp_zip_member(
+    ftp: "FTP", path: str, prefix: str = "produkt", max_size: int = 32 * 1024**2
+) -> Iterator:
+    """
+    Download a ZIP file and open its first member whose name starts
+    with prefix (e.g. the produkt* file of DWD archives)
+
+    The download is kept in memory up to max_size bytes and spooled to
+    a temporary file beyond that. The member is decompressed while it
+    is read.
+    """
+    with SpooledTemporaryFile(max_size) as file:
+        ftp.retrbinary(f"RETR {path}", file.write)
+        file.seek(0)
+
+        with ZipFile(file) as zipped:
+            name = next(
+                (name for name in zipped.namelist() if name.startswith(prefix)), None
+            )
+            if name is None:
+                raise FileNotFoundError(f"No {prefix}* file in {path}")
+
+            with zipped.open(name) as member:
+                yield member
+
+
+class BulkUploader:
+    """
+    Upload files to Meteostat Bulk in the background
+
+    Each worker thread uses its own FTP connection. Submitting blocks
+    while the queue is full, which bounds memory usage.
+    """
+
+    def __init__(
+        self, connect: Callable, connections: int = 4, queue_size: int = 32
+    ) -> None:
+        self._connect = connect
+        self._queue = Queue(queue_size)
+        self._lock = Lock()
+        # Successful uploads (path & digest)
+        self.uploaded = []
+        # Failed uploads (path & error)
+        self.errors = {}
+        self._threads = [
+            Thread(target=self._work, daemon=True) for _ in range(connections)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _work(self) -> None:
+        """
+        Process uploads until a None job is received
+        """
+        bulk = None
+
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+
+            filename, file, digest = job
+            try:
+                if bulk is None:
+                    bulk = self._connect()
+                bulk_store(bulk, filename, file)
+                with self._lock:
+                    self.uploaded.append((filename, digest))
+            except BaseException as error:
+                with self._lock:
+                    self.errors[filename] = error
+                # Reconnect for the next job
+                if bulk is not None:
+                    bulk_cd_invalidate(bulk)
+                    bulk.close()
+                bulk = None
+
+        if bulk is not None:
+            try:
+                bulk.quit()
+            except BaseException:
+                bulk.close()
+
+    def submit(self, filename: str, file, digest: str = None) -> None:
+        """
+        Queue a file for upload
+        """
+        self._queue.put((filename, file, digest))
+
+    def join(self) -> dict:
+        """
+        Wait for all uploads and stop the workers
+
+        Returns failed paths and their errors
+        """
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+        return self.errors
+
+
+class TokenBucket:
+    """
+    Limit the rate of operations across threads
+
+    Allows bursts of up to `burst` operations, refilled at `rate` per second.
+    """
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = Lock()
+
+    def acquire(self) -> None:
+        """
+        Take a token, waiting until one is available
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self._burst, self._tokens + (now - self._updated) * self._rate
+            )
+            self._updated = now
+            # Reserve a token (negative balance delays later calls)
+            self._tokens -= 1
+            delay = -self._tokens / self._rate
+
+        if delay > 0:
+            time.sleep(delay)
+
+
+# Persistent HTTP connections per thread
+_http = local()
+
+
+def http_get(
+    url: str, headers: dict = None, timeout: float = 30, max_redirects: int = 10
+) -> bytes:
+    """
+    Get the (decompressed) body of a URL
+
+    Connections are kept alive per thread & host. Like urllib.request,
+    redirects are followed (up to max_redirects) and all other non-2xx
+    responses raise urllib.error.HTTPError.
+    """
+    # pylint: disable=import-outside-toplevel
+    from http.client import HTTPConnection, HTTPException, HTTPSConnection
+    from urllib.error import HTTPError
+    from urllib.parse import urljoin, urlsplit
+
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc)
+    path = f"{parts.path}?{parts.query}" if parts.query else parts.path
+    headers = {"Accept-Encoding": "gzip", **(headers or {})}
+
+    if not hasattr(_http, "connections"):
+        _http.connections = {}
+
+    while True:
+        con = _http.connections.get(key)
+        reused = con is not None
+        if con is None:
+            cls = HTTPSConnection if parts.scheme == "https" else HTTPConnection
+            con = _http.connections[key] = cls(parts.netloc, timeout=timeout)
+        elif con.sock is not None:
+            con.sock.settimeout(timeout)
+
+        try:
+            con.request("GET", path or "/", headers=headers)
+            response = con.getresponse()
+            body = response.read()
+            break
+        except (HTTPException, OSError) as error:
+            con.close()
+            del _http.connections[key]
+            # Retry once if the server closed an idle connection
+            if reused and isinstance(error, (HTTPException, ConnectionError)):
+                continue
+            raise
+
+    if response.will_close:
+        con.close()
+        del _http.connections[key]
+
+    # Follow redirects
+    location = response.getheader("Location")
+    if response.status in (301, 302, 303, 307, 308) and location:
+        if max_redirects < 1:
+            raise HTTPError(
+                url, response.status, "Too many redirects", response.headers, None
+            )
+        return http_get(urljoin(url, location), headers, timeout, max_redirects - 1)
+
+    if not 200 <= response.status < 300:
+        raise HTTPError(url, response.status, response.reason, response.headers, None)
+
+    if response.getheader("Content-Encoding") == "gzip":
+        body = zlib.decompress(body, 31)
+
+    return body
+
+
+@contextmanager
+def single_run(jsp: Jasper) -> Iterator[bool]:
+    """
+    Hold an exclusive lock per task name while the block runs
+
+    Yields False if a previous run of the task still holds the lock.
+    The lock is released by the OS if the process dies.
+    """
+    # pylint: disable=import-outside-toplevel
+    import fcntl
+
+    path = os.path.join(gettempdir(), f"jasper.{jsp.name}.lock")
+
+    with open(path, "w", encoding="UTF-8") as file:
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+
+        try:
+            yield True
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+@lru_cache(maxsize=4096)
+def _normalize_flag(flag: str) -> str:
+    """
+    Get the sorted, unique characters of a raw GROUP_CONCAT flag string
+    """
+    if flag is None:
+        return None
+
+    return "".join(sorted(set(flag)))
+
+
+def split_flags(data: list, keys: int, columns: int) -> tuple:
+    """
+    Split rows into data rows and source map rows in a single pass
+
+    Data rows hold the values of the first `columns` columns. Map rows
+    hold the first `keys` values, followed by the normalized flags of
+    all other values.
+    """
+    rows = []
+    flags = []
+
+    for row in data:
+        rows.append(row[:columns])
+        flags.append(tuple(row[:keys]) + tuple(map(_normalize_flag, row[columns:])))
+
+    return rows, flags
+
+
+def _row_year(row) -> int:
+    """
+    Get the year of a row which starts with a date (time) or a year
+    """
+    return int(getattr(row[0], "year", row[0]))
+
+
+def group_by_year(data: list, get_year: Callable = _row_year) -> dict:
+    """
+    Split rows into lists per year in a single pass
+
+    Rows should be sorted by time, consecutive rows of a year are
+    added to the year's list at once.
+    """
+    years = {}
+
+    for year, rows in groupby(data, key=lambda row: int(get_year(row))):
+        years.setdefault(year, []).extend(rows)
+
+    return years
+
+
+def _changelog_state(state: str) -> tuple:
+    """
+    Parse a changelog state (JSON or a plain ID cursor)
+    """
+    if not state:
+        return 0, []
+
+    state = json.loads(state)
+
+    if isinstance(state, int):
+        return state, []
+
+    return state["cursor"], state["gaps"]
+
+
+def _find_gaps(ids: list, after: int, now: int) -> list:
+    """
+    Get ranges of IDs which are missing in a sorted list of IDs
+
+    Returns [first ID, last ID, time first seen] per range
+    """
+    gaps = []
+
+    for changelog_id in ids:
+        if changelog_id > after + 1:
+            gaps.append([after + 1, changelog_id - 1, now])
+        after = changelog_id
+
+    return gaps
+
+
+def get_changelog(
+    jsp: Jasper,
+    state: str = None,
+    tables: list = None,
+    limit: int = None,
+    gap_ttl: int = 3600,
+    max_gaps: int = 100,
+) -> tuple:
+    """
+    Get changelog entries (id, table, station, start, end) after a state
+
+    Returns the entries and the state to continue from. Store the state
+    once the entries have been processed.
+
+    IDs which are skipped by the cursor but not visible yet (i.e. their
+    import hasn't been committed) are remembered as gaps. Gaps are read
+    again by later calls, until they show up or are older than gap_ttl
+    seconds (e.g. rolled back imports).
+
+    Requires [db] track_changes (see jasper.actions.persist)
+    """
+    # pylint: disable=import-outside-toplevel
+    from sqlalchemy import bindparam, text
+
+    cursor, gaps = _changelog_state(state)
+    now = int(time.time())
+    columns = "`id`, `table`, `station`, `start`, `end`"
+
+    with jsp.db().connect() as con:
+        # Entries which weren't visible in earlier calls
+        gaps = [gap for gap in gaps if gap[2] > now - gap_ttl]
+        found = []
+
+        if gaps:
+            found = con.execute(
+                text(
+                    f"SELECT {columns} FROM `changelog` WHERE "
+                    + " OR ".join(
+                        f"`id` BETWEEN {int(first)} AND {int(last)}"
+                        for first, last, _ in gaps
+                    )
+                    + " ORDER BY `id`"
+                )
+            ).fetchall()
+
+            # Keep the IDs which are still missing
+            found_ids = [entry[0] for entry in found]
+            remaining = []
+            for first, last, seen in gaps:
+                ids = [i for i in found_ids if first <= i <= last]
+                remaining += _find_gaps(ids + [last + 1], first - 1, seen)
+            gaps = remaining
+
+            if tables is not None:
+                found = [entry for entry in found if entry[1] in tables]
+
+        # New entries
+        query = f"SELECT {columns} FROM `changelog` WHERE `id` > :cursor"
+        params = {"cursor": cursor}
+
+        if tables is not None:
+            query += " AND `table` IN :tables"
+            params["tables"] = tables
+
+        query += " ORDER BY `id`"
+
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+
+        query = text(query)
+        if tables is not None:
+            query = query.bindparams(bindparam("tables", expanding=True))
+
+        entries = con.execute(query, params).fetchall()
+
+        # Remember IDs which the cursor skips
+        if entries:
+            visible = con.execute(
+                text(
+                    """
+                    SELECT `id` FROM `changelog`
+                    WHERE `id` > :cursor AND `id` <= :last
+                    ORDER BY `id`
+                    """
+                ),
+                {"cursor": cursor, "last": entries[-1][0]},
+            ).fetchall()
+            gaps += _find_gaps([row[0] for row in visible], cursor, now)
+            cursor = entries[-1][0]
+
+    state = json.dumps({"cursor": cursor, "gaps": gaps[-max_gaps:]})
+
+    return found + entries, state
+
+
+def get_changelog_head(jsp: Jasper, gap_ttl: int = 3600, max_gaps: int = 100) -> str:
+    """
+    Get a changelog state which skips all visible entries
+
+    Missing IDs among the entries of the last gap_ttl seconds are
+    remembered as gaps (see get_changelog).
+    """
+    last = jsp.query("SELECT COALESCE(MAX(`id`), 0) FROM `changelog`").first()[0]
+    first = jsp.query(
+        """
+        SELECT MIN(`id`) FROM `changelog`
+        WHERE `created` >= NOW(6) - INTERVAL :ttl SECOND
+        """,
+        {"ttl": gap_ttl},
+    ).first()[0]
+
+    gaps = []
+    if first is not None:
+        recent = jsp.query(
+            """
+            SELECT `id` FROM `changelog`
+            WHERE `id` >= :first AND `id` <= :last
+            ORDER BY `id`
+            """,
+            {"first": first, "last": last},
+        ).fetchall()
+        gaps = _find_gaps([row[0] for row in recent], first - 1, int(time.time()))
+
+    return json.dumps({"cursor": last, "gaps": gaps[-max_gaps:]})
+
+
+def get_changes(
+    jsp: Jasper, state: str = None, tables: list = None, limit: int = None
+) -> tuple:
+    """
+    Get the years per station which changed after a changelog state
+
+    Returns the changes and the state to continue from (see get_changelog)
+    """
+    entries, state = get_changelog(jsp, state, tables, limit)
+
+    changes = {}
+    for _, _, station, start, end in entries:
+        changes.setdefault(station, set()).update(range(start.year, end.year + 1))
+
+    return changes, state
+
+
+def _upsert_ranges(
+    jsp: Jasper, table: str, columns: tuple, ranges: dict, widen: bool
+) -> None:
+    """
+    Write start & end per key into an inventory table
+
+    Keys are tuples of the leading key column values. If widen is set,
+    existing ranges are only ever extended.
+    """
+    # pylint: disable=import-outside-toplevel
+    from sqlalchemy import text
+
+    start, end = columns[-2:]
+    if widen:
+        update = (
+            f"`{start}` = COALESCE(LEAST(VALUES(`{start}`), `{start}`), "
+            f"VALUES(`{start}`), `{start}`), "
+            f"`{end}` = COALESCE(GREATEST(VALUES(`{end}`), `{end}`), "
+            f"VALUES(`{end}`), `{end}`)"
+        )
+    else:
+        update = f"`{start}` = VALUES(`{start}`), `{end}` = VALUES(`{end}`)"
+
+    batch_size = jsp.config.getint("db", "batch_size", fallback=1000)
+    items = list(ranges.items())
+
+    with jsp.db().begin() as con:
+        for offset in range(0, len(items), batch_size):
+            batch = items[offset : offset + batch_size]
+            payload = {}
+
+            for row, (key, values) in enumerate(batch):
+                for column, value in zip(columns, tuple(key) + tuple(values)):
+                    payload[f"{column}_{row}"] = value
+
+            con.execute(
+                text(
+                    f"INSERT INTO `{table}` ("
+                    + ", ".join(f"`{column}`" for column in columns)
+                    + ") VALUES "
+                    + ", ".join(
+                        "(" + ", ".join(f":{column}_{row}" for column in columns) + ")"
+                        for row in range(len(batch))
+                    )
+                    + f" ON DUPLICATE KEY UPDATE {update}"
+                ),
+                payload,
+            )
+
+
+def update_inventory(jsp: Jasper, ranges: dict, mode: str, widen: bool = False) -> None:
+    """
+    Update the inventory of a mode from a dict of station: (start, end)
+    """
+    _upsert_ranges(
+        jsp,
+        "inventory",
+        ("station", "mode", "start", "end"),
+        {(station, mode): values for station, values in ranges.items()},
+        widen,
+    )
+
+
+def update_legacy_inventory(
+    jsp: Jasper, ranges: dict, prefix: str, widen: bool = False
+) -> None:
+    """
+    Update the legacy stations_inventory table (e.g. `hourly_start` &
+    `hourly_end` for prefix 'hourly') from a dict of station: (start, end)
+    """
+    _upsert_ranges(
+        jsp,
+        "stations_inventory",
+        ("station", f"{prefix}_start", f"{prefix}_end"),
+        {(station,): values for station, values in ranges.items()},
+        widen,
+    )
+
+
+def extend_range(ranges: dict, key, start, end) -> None:
+    """
+    Widen the (start, end) range of a key in place
+    """
+    if key in ranges:
+        start = min(start, ranges[key][0])
+        end = max(end, ranges[key][1])
+
+    ranges[key] = (start, end)
+
+
+def merge_ranges(*ranges: dict) -> dict:
+    """
+    Merge dicts of key: (start, end) into the widest range per key
+    """
+    merged = {}
+
+    for item in ranges:
+        for key, (start, end) in item.items():
+            extend_range(merged, key, start, end)
+
+    return merged
 
 
 def get_stations(jsp: Jasper, query: str, limit: int) -> list:
     """
     Get list of weather stations based on counter
     """
+    # pylint: disable=import-outside-toplevel
+    from sqlalchemy import text
+
     # Get counter value
     skip = jsp.get_var("station_counter", 0, int)
 
@@ -58,3 +835,23 @@ def get_stations(jsp: Jasper, query: str, limit: int) -> list:
         jsp.set_var("station_counter", skip + limit)
 
     return result.fetchall()
+
+
+def query_stations(
+    jsp: Jasper, query: str, stations: list, payload: dict = None
+) -> list:
+    """
+    Get all rows of an SQL query for a list of weather stations
+
+    The query should filter by `station` IN :stations
+    """
+    # pylint: disable=import-outside-toplevel
+    from sqlalchemy import bindparam, text
+
+    with jsp.db().connect() as con:
+        result = con.execute(
+            text(query).bindparams(bindparam("stations", expanding=True)),
+            {**(payload or {}), "stations": list(stations)},
+        )
+
+        return result.fetchall()
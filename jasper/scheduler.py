@@ -0,0 +1,243 @@
+"""
+Jasper Scheduler
+
+Run the tasks of a crontab from a single, long-running process.
+Scripts are executed by a pool of pre-forked worker processes
+which keep heavy modules imported and share DB engines.
+
+Usage: python3 -m jasper.scheduler [crontab]
+
+The code is licensed under the MIT license.
+"""
+
+from configparser import ConfigParser
+from datetime import datetime, timedelta
+import multiprocessing
+import os
+import runpy
+import shlex
+import subprocess
+import sys
+import time
+import traceback
+from typing import NamedTuple, Union
+import warnings
+from .core import Jasper
+
+
+class Task(NamedTuple):
+    """
+    A single crontab entry
+    """
+
+    # Minute, hour, day of month, month and day of week
+    schedule: tuple
+    # Path of the Python script (None for shell commands)
+    script: Union[str, None]
+    # Command line arguments or shell command
+    args: list
+    # Ignore warnings (python3 -W ignore)
+    ignore_warnings: bool = False
+
+
+def _parse_field(field: str, minimum: int, maximum: int) -> set:
+    """
+    Get all values matched by a crontab field
+    """
+    values = set()
+
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step = part.split("/")
+            step = int(step)
+
+        if part == "*":
+            start, end = minimum, maximum
+        elif "-" in part:
+            start, end = map(int, part.split("-"))
+        else:
+            start = int(part)
+            end = maximum if step > 1 else start
+
+        values.update(range(start, end + 1, step))
+
+    return values
+
+
+def parse_crontab(path: str) -> list:
+    """
+    Read all tasks from a crontab file
+    """
+    tasks = []
+
+    with open(path, "r", encoding="UTF-8") as file:
+        for line in file:
+            line = line.strip()
+
+            # Skip comments and empty lines
+            if not line or line.startswith("#"):
+                continue
+
+            fields = line.split(None, 5)
+            if len(fields) < 6:
+                continue
+
+            # 0 and 7 are Sunday
+            days_of_week = {day % 7 for day in _parse_field(fields[4], 0, 7)}
+            schedule = (
+                _parse_field(fields[0], 0, 59),
+                _parse_field(fields[1], 0, 23),
+                _parse_field(fields[2], 1, 31),
+                _parse_field(fields[3], 1, 12),
+                days_of_week,
+                fields[2] == "*",
+                fields[4] == "*",
+            )
+            command = shlex.split(fields[5])
+            scripts = [arg for arg in command if arg.endswith(".py")]
+
+            if command[0].startswith("python") and scripts:
+                position = command.index(scripts[0])
+                tasks.append(
+                    Task(
+                        schedule,
+                        os.path.expanduser(scripts[0]),
+                        command[position + 1 :],
+                        "ignore" in command[1:position],
+                    )
+                )
+            else:
+                tasks.append(Task(schedule, None, [fields[5]]))
+
+    return tasks
+
+
+def is_due(task: Task, now: datetime) -> bool:
+    """
+    Check if a task is scheduled for the given minute
+    """
+    minutes, hours, days, months, days_of_week, any_day, any_weekday = task.schedule
+
+    if now.minute not in minutes or now.hour not in hours or now.month not in months:
+        return False
+
+    day = now.day in days
+    weekday = (now.weekday() + 1) % 7 in days_of_week
+
+    # Cron matches either field if both are restricted
+    if not any_day and not any_weekday:
+        return day or weekday
+
+    return day and weekday
+
+
+def run_task(task: Task) -> None:
+    """
+    Execute a task in the current (worker) process
+    """
+    if task.script is None:
+        subprocess.run(task.args[0], shell=True, check=False)
+        return None
+
+    argv = sys.argv
+    sys.argv = [task.script, *task.args]
+
+    try:
+        with warnings.catch_warnings():
+            if task.ignore_warnings:
+                warnings.simplefilter("ignore")
+            runpy.run_path(task.script, run_name="__main__")
+    except SystemExit:
+        pass
+    except BaseException:
+        print(f"Task {task.script} {' '.join(task.args)} failed:", file=sys.stderr)
+        traceback.print_exc()
+    finally:
+        sys.argv = argv
+
+    return None
+
+
+def _init_worker() -> None:
+    """
+    Prepare a worker process
+    """
+    Jasper.persistent = True
+
+
+def _warm_up() -> None:
+    """
+    Import heavy modules before forking the workers
+    """
+    # pylint: disable=import-outside-toplevel,unused-import
+    import numpy
+    import pandas
+    import sqlalchemy
+    from . import actions, convert, helpers, schema, validation
+
+    for module in ("lxml.etree", "metar.Metar"):
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+
+
+def main() -> None:
+    """
+    Run all crontab tasks on schedule
+    """
+    config = ConfigParser()
+    config.read(Jasper._config_path)  # pylint: disable=protected-access
+
+    path = (
+        sys.argv[1]
+        if len(sys.argv) > 1
+        else os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        + os.sep
+        + "crontab"
+    )
+    tasks = parse_crontab(path)
+
+    _warm_up()
+
+    # One worker per task allows all tasks to run concurrently, like cron
+    pool = multiprocessing.get_context("fork").Pool(
+        config.getint("scheduler", "workers", fallback=len(tasks)),
+        initializer=_init_worker,
+        maxtasksperchild=config.getint(
+            "scheduler", "max_tasks_per_worker", fallback=100
+        ),
+    )
+
+    # Latest run of each task (AsyncResult by task index)
+    runs = {}
+
+    try:
+        while True:
+            # Wait for the next minute
+            now = datetime.now()
+            upcoming = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+            time.sleep((upcoming - now).total_seconds())
+
+            for index, task in enumerate(tasks):
+                if not is_due(task, upcoming):
+                    continue
+
+                # Skip tasks whose previous run is still queued or running
+                if index in runs and not runs[index].ready():
+                    command = " ".join(filter(None, (task.script, *task.args)))
+                    print(
+                        f"{upcoming:%Y-%m-%d %H:%M} Skipping task {command}: "
+                        + "previous run hasn't finished",
+                        file=sys.stderr,
+                    )
+                    continue
+
+                runs[index] = pool.apply_async(run_task, (task,))
+    finally:
+        pool.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Jasper Station Resolver
+
+Map external identifiers (e.g. national IDs) to Meteostat weather stations.
+Mappings are loaded on first use and shared by the whole process.
+
+The code is licensed under the MIT license.
+"""
+
+import csv
+import os
+import sys
+from threading import Lock
+import time
+from typing import Union
+from .core import Jasper
+
+# Identifiers which are stored in the stations table
+IDENTIFIERS = ("national_id", "wmo", "icao", "mosmix")
+# Identifiers which are stored in resource files (file name & columns)
+RESOURCES = {
+    "ghcn": ("ghcn.csv", ("id", "ghcn")),
+    "usaf_wban": ("usaf_wban.csv", ("id", "usaf", "wban")),
+}
+
+# Weather stations by identifier & value
+_stations = {}
+# Weather stations by Meteostat ID
+_by_id = {}
+# Time of the last refresh by source ("db" or resource identifier)
+_loaded = {}
+_lock = Lock()
+
+
+def _load_db(jsp: Jasper) -> None:
+    """
+    Load all mappings of the stations table into memory
+    """
+    # pylint: disable=import-outside-toplevel
+    from sqlalchemy import text
+
+    # pylint: disable=global-statement
+    global _by_id
+
+    stations = {identifier: {} for identifier in IDENTIFIERS}
+    by_id = {}
+
+    with jsp.db().connect() as con:
+        result = con.execute(
+            text(
+                f"""
+                SELECT
+                    `id`,
+                    `altitude`,
+                    {", ".join(f"`{identifier}`" for identifier in IDENTIFIERS)}
+                FROM
+                    `stations`
+                ORDER BY
+                    `id`
+                """
+            )
+        )
+
+        for row in result.mappings():
+            station = dict(row)
+            by_id[station["id"]] = station
+            for identifier in IDENTIFIERS:
+                if station[identifier] is not None:
+                    stations[identifier].setdefault(str(station[identifier]), station)
+
+    _stations.update(stations)
+    _by_id = by_id
+    _loaded["db"] = time.time()
+
+    # Resource mappings point to the previous stations
+    for identifier in RESOURCES:
+        _loaded.pop(identifier, None)
+
+
+def _load_resource(identifier: str) -> None:
+    """
+    Load the mapping of a resource file into memory
+    """
+    filename, columns = RESOURCES[identifier]
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "resources")
+    stations = {}
+
+    with open(os.path.join(path, filename), "r", encoding="UTF-8") as file:
+        for row in csv.DictReader(file, fieldnames=columns):
+            if row["id"] in _by_id:
+                value = "-".join(row[column] for column in columns[1:])
+                stations.setdefault(value, _by_id[row["id"]])
+
+    _stations[identifier] = stations
+    _loaded[identifier] = time.time()
+
+
+def _refresh(source: str, load, ttl: int) -> None:
+    """
+    Reload a source after the TTL
+
+    A failed refresh keeps the previous mappings until the next TTL.
+    Without previous mappings, the error is raised.
+    """
+    if time.time() - _loaded.get(source, 0) <= ttl:
+        return None
+
+    try:
+        load()
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        # Nothing to fall back to
+        if (IDENTIFIERS[0] if source == "db" else source) not in _stations:
+            raise
+        _loaded[source] = time.time()
+        print(f"Refreshing {source} stations failed: {error}", file=sys.stderr)
+
+    return None
+
+
+def station_map(jsp: Jasper, identifier: str) -> dict:
+    """
+    Get all weather stations (id, altitude & identifiers) by the values
+    of an external identifier, e.g. station_map(jsp, "icao")
+
+    USAF & WBAN IDs are joined by a hyphen. Mappings are loaded on first
+    use and refreshed after [db] stations_ttl seconds.
+    """
+    if identifier not in IDENTIFIERS and identifier not in RESOURCES:
+        raise KeyError(identifier)
+
+    ttl = jsp.config.getint("db", "stations_ttl", fallback=3600)
+
+    with _lock:
+        _refresh("db", lambda: _load_db(jsp), ttl)
+        if identifier in RESOURCES:
+            _refresh(identifier, lambda: _load_resource(identifier), ttl)
+
+    return _stations[identifier]
+
+
+def resolve_station(jsp: Jasper, identifier: str, value) -> Union[dict, None]:
+    """
+    Get the weather station for an external identifier,
+    e.g. resolve_station(jsp, "wmo", "10637")
+    """
+    return station_map(jsp, identifier).get(str(value))
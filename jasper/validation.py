@@ -4,7 +4,9 @@ Performe simple quality checks on meteorological data
 The code is licensed under the MIT license.
 """
 
+import numpy as np
 from numpy import isnan
+import pandas as pd
 
 
 def temp(value):
@@ -212,3 +214,191 @@ def coco(value):
         return value
     except BaseException:
         return None
+
+
+def _mask(values, minimum: float = None, maximum: float = None, clip: float = None):
+    """
+    Replace NaN and out-of-range values with NaN (vectorized)
+
+    Values above clip are set to clip. Accepts NumPy arrays
+    and Pandas Series and returns the same type.
+    """
+    if isinstance(values, pd.Series):
+        array = values.to_numpy(dtype=float, na_value=np.nan)
+    else:
+        array = np.asarray(values, dtype=float)
+
+    valid = ~np.isnan(array)
+    if minimum is not None:
+        valid &= array >= minimum
+    if maximum is not None:
+        valid &= array <= maximum
+
+    # Nothing to change
+    if valid.all() and (clip is None or not (array > clip).any()):
+        return values
+
+    array = np.where(valid, array, np.nan)
+    if clip is not None:
+        array = np.minimum(array, clip)
+
+    if isinstance(values, pd.Series):
+        return pd.Series(array, index=values.index, name=values.name)
+
+    return array
+
+
+def temp_array(values):
+    """
+    Validate all sorts of temperature data (Celsius), vectorized
+    """
+    return _mask(values, -100, 65)
+
+
+def rhum_array(values):
+    """
+    Validate relative humidity data (percentage), vectorized
+    """
+    return _mask(values, 0, 100)
+
+
+def prcp_hourly_array(values):
+    """
+    Validate hourly precipitation data (mm), vectorized
+    """
+    return _mask(values, 0, 350)
+
+
+def prcp_daily_array(values):
+    """
+    Validate daily precipitation data (mm), vectorized
+    """
+    return _mask(values, 0, 2000)
+
+
+def prcp_monthly_array(values):
+    """
+    Validate monthly precipitation data (mm), vectorized
+    """
+    return _mask(values, 0, 10000)
+
+
+def wspd_array(values):
+    """
+    Validate (average) wind speed data (km/h), vectorized
+    """
+    return _mask(values, 0, 250)
+
+
+def wpgt_array(values):
+    """
+    Validate peak wind gust data (km/h), vectorized
+    """
+    return _mask(values, 0, 500)
+
+
+def wdir_array(values):
+    """
+    Validate wind direction data (degrees), vectorized
+    """
+    return _mask(values, 0, 360)
+
+
+def pres_array(values):
+    """
+    Validate MSL air pressure data (hPa), vectorized
+    """
+    return _mask(values, 850, 1090)
+
+
+def snow_array(values):
+    """
+    Validate snow cover data (mm), vectorized
+    """
+    return _mask(values, 0, 11000)
+
+
+def tsun_hourly_array(values):
+    """
+    Validate hourly sunshine duration data (minutes), vectorized
+    """
+    return _mask(values, 0, 60)
+
+
+def tsun_daily_array(values):
+    """
+    Validate daily sunshine duration data (minutes), vectorized
+    """
+    return _mask(values, 0, 1440)
+
+
+def tsun_monthly_array(values):
+    """
+    Validate monthly sunshine duration data (minutes), vectorized
+    """
+    return _mask(values, 0, 44640)
+
+
+def srad_array(values):
+    """
+    Validate solar radiation data (W/M^2), vectorized
+    """
+    return _mask(values, 0, 1368)
+
+
+def cldc_array(values):
+    """
+    Validate cloud cover (oktas), vectorized
+    """
+    return _mask(values, 0, 8)
+
+
+def vsby_array(values):
+    """
+    Validate visibility (meters), vectorized
+    """
+    return _mask(values, 0, clip=9999)
+
+
+def coco_array(values):
+    """
+    Validate weather condition codes, vectorized
+    """
+    return _mask(values, 0, 27)
+
+
+# Vectorized counterparts of the scalar validators
+VECTORIZED = {
+    temp: temp_array,
+    rhum: rhum_array,
+    prcp_hourly: prcp_hourly_array,
+    prcp_daily: prcp_daily_array,
+    prcp_monthly: prcp_monthly_array,
+    wspd: wspd_array,
+    wpgt: wpgt_array,
+    wdir: wdir_array,
+    pres: pres_array,
+    snow: snow_array,
+    tsun_hourly: tsun_hourly_array,
+    tsun_daily: tsun_daily_array,
+    tsun_monthly: tsun_monthly_array,
+    srad: srad_array,
+    cldc: cldc_array,
+    vsby: vsby_array,
+    coco: coco_array,
+}
+
+
+def validate(values: pd.Series, validator) -> pd.Series:
+    """
+    Apply a scalar validator to a Series, preferring its vectorized version
+
+    Columns which cannot be cast to float fall back to the scalar validator.
+    """
+    if validator in VECTORIZED:
+        try:
+            return VECTORIZED[validator](values)
+        except (TypeError, ValueError):
+            pass
+
+    return values.apply(validator)
@@ -0,0 +1,10 @@
+CREATE TABLE `changelog` (
+  `id` BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+  `table` VARCHAR(32) NOT NULL,
+  `station` VARCHAR(5) NOT NULL,
+  `start` DATETIME NOT NULL,
+  `end` DATETIME NOT NULL,
+  `created` DATETIME(6) NOT NULL,
+  PRIMARY KEY (`id`),
+  KEY `created` (`created`)
+)
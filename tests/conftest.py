@@ -0,0 +1,147 @@
+"""
+Shared test fixtures
+
+The code is licensed under the MIT license.
+"""
+
+from ftplib import error_perm
+import posixpath
+import runpy
+import sys
+import pytest
+from jasper import Jasper
+
+
+@pytest.fixture
+def jsp(tmp_path, monkeypatch):
+    """
+    Jasper instance with an empty configuration file
+    """
+    config = tmp_path / "config.ini"
+    config.write_text("[db]\n[bulk]\n[import]\n", encoding="UTF-8")
+    monkeypatch.setattr(Jasper, "_config_path", str(config))
+
+    return Jasper("test")
+
+
+@pytest.fixture
+def run_script(tmp_path, monkeypatch):
+    """
+    Run a cron script with its own configuration file & station mappings
+
+    Returns all DataFrames passed to persist()
+    """
+
+    def run(script: str, config: str, stations: dict, args: list = None) -> list:
+        persisted = []
+
+        path = tmp_path / "config.ini"
+        path.write_text(config, encoding="UTF-8")
+        monkeypatch.setattr(Jasper, "_config_path", str(path))
+        monkeypatch.setattr(
+            "jasper.stations.station_map",
+            lambda jsp, identifier: {
+                value: {"id": station} for value, station in stations.items()
+            },
+        )
+        monkeypatch.setattr(
+            "jasper.actions.persist", lambda jsp, df, schema: persisted.append(df)
+        )
+        monkeypatch.setattr(sys, "argv", [script, *(args or [])])
+
+        runpy.run_path(script, run_name="__main__")
+
+        return persisted
+
+    return run
+
+
+class FakeDataConnection:
+    """
+    Data connection of a fake FTP transfer
+    """
+
+    def __init__(self, bulk: "FakeBulk", path: str) -> None:
+        self.bulk = bulk
+        self.path = path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+    def sendall(self, data: bytes) -> None:
+        """
+        Append data to the stored file
+        """
+        self.bulk.files[self.path] += data
+
+
+class FakeBulk:
+    """
+    In-memory FTP server with a single connection
+    """
+
+    def __init__(self) -> None:
+        self.directories = {"/"}
+        self.path = "/"
+        self.files = {}
+        self.commands = []
+        # Number of STOR commands to reject
+        self.fail_stor = 0
+        # Error raised after the transfer
+        self.fail_resp = None
+
+    def _abspath(self, path: str) -> str:
+        return posixpath.normpath(posixpath.join(self.path, path))
+
+    def cwd(self, path: str) -> None:
+        """
+        Change the working directory
+        """
+        self.commands.append(f"CWD {path}")
+        if self._abspath(path) not in self.directories:
+            raise error_perm("550 No such directory")
+        self.path = self._abspath(path)
+
+    def mkd(self, path: str) -> None:
+        """
+        Create a directory
+        """
+        self.commands.append(f"MKD {path}")
+        self.directories.add(self._abspath(path))
+
+    def voidcmd(self, command: str) -> None:
+        """
+        Send a command
+        """
+        self.commands.append(command)
+
+    def transfercmd(self, command: str) -> FakeDataConnection:
+        """
+        Start a transfer
+        """
+        self.commands.append(command)
+        if self.fail_stor:
+            self.fail_stor -= 1
+            raise error_perm("553 Could not create file")
+
+        path = self._abspath(command.split(" ", 1)[1])
+        self.files[path] = b""
+        return FakeDataConnection(self, path)
+
+    def voidresp(self) -> None:
+        """
+        Get the response of a transfer
+        """
+        if self.fail_resp:
+            raise self.fail_resp
+
+
+@pytest.fixture
+def bulk():
+    """
+    In-memory Meteostat Bulk server
+    """
+    return FakeBulk()
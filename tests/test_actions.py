@@ -0,0 +1,176 @@
+"""
+Tests for jasper.actions
+
+The code is licensed under the MIT license.
+"""
+
+from contextlib import contextmanager
+import gzip
+import re
+import pandas as pd
+import pytest
+from sqlalchemy import text
+from jasper import schema
+from jasper.actions import _batch_query, export_csv, persist
+
+QUERY = """
+    INSERT INTO `hourly_test`
+    SET
+        `station` = :station,
+        `time` = :time,
+        `temp` = ROUND(:temp, 1),
+        `prcp` = COALESCE(:prcp, 0)
+    ON DUPLICATE KEY UPDATE
+        `temp` = COALESCE(VALUES(`temp`),`temp`),
+        `prcp` = COALESCE(VALUES(`prcp`),`prcp`)
+"""
+
+
+class FakeEngine:
+    """
+    Engine which records all executed statements
+    """
+
+    def __init__(self):
+        self.statements = []
+
+    @contextmanager
+    def begin(self):
+        """
+        Start a (fake) transaction
+        """
+        yield self
+
+    def execute(self, statement, payload):
+        """
+        Record a statement & its parameters
+        """
+        self.statements.append((str(statement), payload))
+
+
+def test_batch_query_single_row():
+    """
+    A single row keeps columns, values & update clause
+    """
+    query = _batch_query(QUERY, 1)
+
+    assert query == (
+        "INSERT INTO `hourly_test` (`station`, `time`, `temp`, `prcp`) "
+        + "VALUES (:station_0, :time_0, ROUND(:temp_0, 1), COALESCE(:prcp_0, 0)) "
+        + "ON DUPLICATE KEY UPDATE\n"
+        + "        `temp` = COALESCE(VALUES(`temp`),`temp`),\n"
+        + "        `prcp` = COALESCE(VALUES(`prcp`),`prcp`)\n"
+    )
+
+
+def test_batch_query_multiple_rows():
+    """
+    Parameters of the n-th row are suffixed with _n
+    """
+    query = _batch_query(QUERY, 3)
+    rows = re.findall(r"\(:station_(\d+), :time_\1, ROUND\(:temp_\1, 1\), ", query)
+
+    assert rows == ["0", "1", "2"]
+    assert set(text(query).compile().params) == {
+        f"{column}_{row}"
+        for column in ("station", "time", "temp", "prcp")
+        for row in range(3)
+    }
+
+
+def test_batch_query_rejects_other_queries():
+    """
+    Only INSERT ... SET ... ON DUPLICATE KEY UPDATE queries can be batched
+    """
+    with pytest.raises(ValueError):
+        _batch_query("UPDATE `stations` SET `name` = :name", 2)
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        name
+        for name, value in vars(schema).items()
+        if isinstance(value, dict) and "import_query" in value
+    ],
+)
+def test_batch_query_schemas(name):
+    """
+    All import queries can be batched
+    """
+    query = getattr(schema, name)["import_query"]
+    params = set(text(query).compile().params)
+
+    assert set(text(_batch_query(query, 2)).compile().params) == {
+        f"{param}_{row}" for param in params for row in range(2)
+    }
+
+
+def test_persist_batches(jsp, monkeypatch):
+    """
+    Records are written in statements of batch_size rows
+    """
+    engine = FakeEngine()
+    monkeypatch.setattr(jsp, "db", lambda: engine)
+
+    data = pd.DataFrame(
+        {
+            "station": ["10637"] * 5,
+            "time": pd.date_range("2026-01-01", periods=5, freq="h"),
+            "temp": [1.0, 2.0, None, 4.0, 5.0],
+            "prcp": [0.0, None, 0.5, None, None],
+        }
+    ).set_index(["station", "time"])
+
+    persist(jsp, data, schema.hourly_global, batch_size=2)
+
+    assert [len(payload) for _, payload in engine.statements] == [18, 18, 9]
+    assert engine.statements[-1][0] == _batch_query(
+        schema.hourly_global["import_query"], 1
+    )
+    assert engine.statements[0][1]["time_1"] == "2026-01-01 01:00:00"
+    assert pd.isna(engine.statements[1][1]["temp_0"])
+    assert engine.statements[1][1]["prcp_0"] == 0.5
+    assert engine.statements[2][1]["temp_0"] == 5.0
+    # Columns which are not in the DataFrame are set by the template
+    assert engine.statements[2][1]["wspd_0"] is None
+
+
+def test_export_csv(jsp, bulk, monkeypatch):
+    """
+    Gzipped CSV files are stored in their directory
+    """
+    monkeypatch.setattr(jsp, "bulk", lambda: bulk)
+    rows = [["10637", "2026-01-01", 1.5], ["10637", "2026-01-02", None]]
+
+    export_csv(jsp, rows, "/daily/10637.csv.gz", chunk_size=1)
+
+    assert gzip.decompress(bulk.files["/daily/10637.csv.gz"]) == (
+        b"10637,2026-01-01,1.5\r\n10637,2026-01-02,\r\n"
+    )
+    assert jsp.stats["uploads"] == 1
+
+
+def test_export_csv_manifest(jsp, bulk, monkeypatch, tmp_path):
+    """
+    Unchanged files are only uploaded once if the manifest is enabled
+    """
+    monkeypatch.setattr(jsp, "bulk", lambda: bulk)
+    jsp.config.set("bulk", "manifest", str(tmp_path / "manifest.db"))
+    rows = [["10637", "2026-01-01", 1.5]] * 3000
+
+    export_csv(jsp, rows, "/daily/10637.csv.gz")
+    content = bulk.files["/daily/10637.csv.gz"]
+    export_csv(jsp, rows, "/daily/10637.csv.gz")
+
+    assert gzip.decompress(content) == b"10637,2026-01-01,1.5\r\n" * 3000
+    assert bulk.commands.count("STOR /daily/10637.csv.gz") == 1
+    assert jsp.stats == {"uploads": 1, "uploads_skipped": 1}
+
+    # Changed files are uploaded again
+    export_csv(jsp, rows[1:], "/daily/10637.csv.gz")
+
+    assert gzip.decompress(bulk.files["/daily/10637.csv.gz"]) == (
+        b"10637,2026-01-01,1.5\r\n" * 2999
+    )
+    jsp.manifest().close()
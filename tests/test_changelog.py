@@ -0,0 +1,214 @@
+"""
+Tests for the changelog helpers of jasper.helpers
+
+The code is licensed under the MIT license.
+"""
+
+import json
+import pytest
+from sqlalchemy import create_engine, text
+from jasper.helpers import _find_gaps, get_changelog
+
+# Current (fake) UNIX time
+NOW = 1_800_000_000
+
+
+@pytest.fixture
+def changelog(jsp, monkeypatch):
+    """
+    Changelog table in an in-memory SQLite DB, yields an insert function
+    """
+    engine = create_engine("sqlite://")
+    monkeypatch.setattr(jsp, "db", lambda: engine)
+    monkeypatch.setattr("time.time", lambda: NOW)
+
+    with engine.begin() as con:
+        con.execute(
+            text(
+                """
+                CREATE TABLE `changelog` (
+                    `id` INTEGER PRIMARY KEY,
+                    `table` TEXT NOT NULL,
+                    `station` TEXT NOT NULL,
+                    `start` TEXT NOT NULL,
+                    `end` TEXT NOT NULL,
+                    `created` TEXT NOT NULL
+                )
+                """
+            )
+        )
+
+    def insert(*ids: int, table: str = "hourly_synop") -> None:
+        with engine.begin() as con:
+            for changelog_id in ids:
+                con.execute(
+                    text(
+                        """
+                        INSERT INTO `changelog`
+                        VALUES (:id, :table, '10637', '2026-01-01', '2026-01-02', '')
+                        """
+                    ),
+                    {"id": changelog_id, "table": table},
+                )
+
+    return insert
+
+
+def ids(entries: list) -> list:
+    """
+    Get the IDs of changelog entries
+    """
+    return [entry[0] for entry in entries]
+
+
+def test_find_gaps():
+    """
+    Missing IDs after a cursor are grouped into ranges
+    """
+    assert _find_gaps([3, 4, 7], 1, NOW) == [[2, 2, NOW], [5, 6, NOW]]
+    assert _find_gaps([2, 3, 4], 1, NOW) == []
+    assert _find_gaps([], 1, NOW) == []
+
+
+def test_get_changelog(jsp, changelog):
+    """
+    New entries are returned after the cursor
+    """
+    changelog(1, 2, 3)
+
+    entries, state = get_changelog(jsp)
+    assert ids(entries) == [1, 2, 3]
+    assert json.loads(state) == {"cursor": 3, "gaps": []}
+
+    changelog(4)
+
+    entries, state = get_changelog(jsp, state)
+    assert ids(entries) == [4]
+
+    entries, state = get_changelog(jsp, state)
+    assert ids(entries) == []
+    assert json.loads(state) == {"cursor": 4, "gaps": []}
+
+
+def test_get_changelog_legacy_cursor(jsp, changelog):
+    """
+    Plain ID cursors are accepted
+    """
+    changelog(1, 2, 3)
+
+    entries, state = get_changelog(jsp, "2")
+
+    assert ids(entries) == [3]
+    assert json.loads(state) == {"cursor": 3, "gaps": []}
+
+
+def test_get_changelog_limit(jsp, changelog):
+    """
+    The cursor moves to the last returned entry
+    """
+    changelog(1, 2, 3, 4, 5)
+
+    entries, state = get_changelog(jsp, limit=2)
+    assert ids(entries) == [1, 2]
+
+    entries, state = get_changelog(jsp, state, limit=2)
+    assert ids(entries) == [3, 4]
+    assert json.loads(state)["cursor"] == 4
+
+
+def test_get_changelog_gap_filled(jsp, changelog):
+    """
+    Entries which commit after the cursor passed are returned later
+    """
+    changelog(1, 2, 4, 7)
+
+    entries, state = get_changelog(jsp)
+    assert ids(entries) == [1, 2, 4, 7]
+    assert json.loads(state) == {
+        "cursor": 7,
+        "gaps": [[3, 3, NOW], [5, 6, NOW]],
+    }
+
+    # Late commits
+    changelog(3, 6, 8)
+
+    entries, state = get_changelog(jsp, state)
+    assert ids(entries) == [3, 6, 8]
+    assert json.loads(state) == {"cursor": 8, "gaps": [[5, 5, NOW]]}
+
+    changelog(5)
+
+    entries, state = get_changelog(jsp, state)
+    assert ids(entries) == [5]
+    assert json.loads(state) == {"cursor": 8, "gaps": []}
+
+
+def test_get_changelog_gap_expired(jsp, changelog, monkeypatch):
+    """
+    Gaps are dropped after gap_ttl seconds (e.g. rolled back imports)
+    """
+    changelog(1, 3)
+
+    _, state = get_changelog(jsp, gap_ttl=60)
+    assert json.loads(state)["gaps"] == [[2, 2, NOW]]
+
+    # Still within gap_ttl
+    monkeypatch.setattr("time.time", lambda: NOW + 59)
+    _, kept = get_changelog(jsp, state, gap_ttl=60)
+    assert json.loads(kept)["gaps"] == [[2, 2, NOW]]
+
+    # Expired, late commits aren't returned anymore
+    monkeypatch.setattr("time.time", lambda: NOW + 61)
+    changelog(2)
+
+    entries, state = get_changelog(jsp, kept, gap_ttl=60)
+    assert ids(entries) == []
+    assert json.loads(state) == {"cursor": 3, "gaps": []}
+
+
+def test_get_changelog_max_gaps(jsp, changelog):
+    """
+    Only the latest max_gaps gaps are kept
+    """
+    changelog(1, 3, 5, 7, 9)
+
+    _, state = get_changelog(jsp, max_gaps=2)
+
+    assert json.loads(state)["gaps"] == [[6, 6, NOW], [8, 8, NOW]]
+
+
+def test_get_changelog_tables(jsp, changelog):
+    """
+    Entries of other tables are neither returned nor treated as gaps
+    """
+    changelog(1, 3, 5)
+    changelog(2, 4, table="daily_national")
+
+    entries, state = get_changelog(jsp, tables=["hourly_synop"])
+    assert ids(entries) == [1, 3, 5]
+    assert json.loads(state) == {"cursor": 5, "gaps": []}
+
+    # Cursor skips trailing entries of other tables
+    changelog(6, table="daily_national")
+    changelog(7)
+
+    entries, state = get_changelog(jsp, state, tables=["hourly_synop"])
+    assert ids(entries) == [7]
+    assert json.loads(state) == {"cursor": 7, "gaps": []}
+
+
+def test_get_changelog_tables_gap(jsp, changelog):
+    """
+    Late commits of other tables close gaps without being returned
+    """
+    changelog(1, 4)
+
+    _, state = get_changelog(jsp, tables=["hourly_synop"])
+    assert json.loads(state)["gaps"] == [[2, 3, NOW]]
+
+    changelog(2, table="daily_national")
+    changelog(3)
+
+    entries, state = get_changelog(jsp, state, tables=["hourly_synop"])
+    assert ids(entries) == [3]
+    assert json.loads(state) == {"cursor": 4, "gaps": []}
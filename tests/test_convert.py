@@ -0,0 +1,107 @@
+"""
+Tests for jasper.convert
+
+The code is licensed under the MIT license.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from jasper import convert
+
+TEMP = [None, np.nan, -40.0, -5.3, 0.0, 12.4, 25.0, 38.9]
+DWPT = [0.0, 1.0, -45.0, -8.1, np.nan, 10.2, 25.0, 20.5]
+PRES = [1000.0, 1013.2, -999.0, 980.4, 850.0, 1020.1, None, 1005.0]
+
+
+def assert_same(result, expected):
+    """
+    Compare vectorized results (NaN) with scalar results (None)
+    """
+    result = [None if pd.isna(value) else value for value in result]
+
+    assert result == pytest.approx(expected, nan_ok=True)
+
+
+@pytest.mark.parametrize(
+    "scalar, vectorized, values",
+    [
+        (convert.kelvin_to_celsius, convert.kelvin_to_celsius_array, [None, 0, 273.15]),
+        (convert.ms_to_kmh, convert.ms_to_kmh_array, [None, np.nan, 0, 2.5, 40]),
+        (
+            convert.percentage_to_okta,
+            convert.percentage_to_okta_array,
+            [None, 0, 6.25, 18.75, 50, 99, 100],
+        ),
+        (convert.jcm2_to_wm2, convert.jcm2_to_wm2_array, [None, 0, 0.9, 150, 1000]),
+    ],
+)
+def test_unit_conversions(scalar, vectorized, values):
+    """
+    Vectorized unit conversions match their scalar versions
+    """
+    expected = [scalar(value) for value in values]
+
+    assert_same(vectorized(pd.Series(values, dtype=float)), expected)
+    assert_same(vectorized(values), expected)
+
+
+def test_temp_dwpt_to_rhum():
+    """
+    Relative humidity matches the scalar version
+    """
+    expected = [
+        convert.temp_dwpt_to_rhum({"temp": temp, "dwpt": dwpt})
+        if temp is not None and not np.isnan(temp) and not np.isnan(dwpt)
+        else None
+        for temp, dwpt in zip(TEMP, DWPT)
+    ]
+
+    assert_same(convert.temp_dwpt_to_rhum_array(TEMP, DWPT), expected)
+
+
+@pytest.mark.parametrize("altitude", [0, 112, 1500])
+def test_pres_to_msl(altitude):
+    """
+    MSL air pressure matches the scalar version
+    """
+    expected = [
+        convert.pres_to_msl(
+            {"pres": np.nan if pres is None else pres, "tavg": temp}, altitude
+        )
+        for pres, temp in zip(PRES, TEMP)
+    ]
+
+    assert_same(convert.pres_to_msl_array(PRES, TEMP, altitude), expected)
+
+
+def test_pres_to_msl_altitudes():
+    """
+    Altitudes may be given per row
+    """
+    altitudes = [0, 112, 1500, 112, 0, 3000, 10, 10]
+    expected = [
+        convert.pres_to_msl(
+            {"pres": np.nan if pres is None else pres, "tavg": temp}, altitude
+        )
+        for pres, temp, altitude in zip(PRES, TEMP, altitudes)
+    ]
+
+    assert_same(convert.pres_to_msl_array(PRES, TEMP, altitudes), expected)
+
+
+@pytest.mark.parametrize("altitude", [None, np.nan])
+def test_pres_to_msl_without_altitude(altitude):
+    """
+    Nothing is converted without altitude
+    """
+    assert np.isnan(convert.pres_to_msl_array(PRES, TEMP, altitude)).all()
+
+
+def test_series_index():
+    """
+    Series keep their index
+    """
+    series = pd.Series([1.0, 2.0], index=["a", "b"])
+
+    assert list(convert.ms_to_kmh_array(series).index) == ["a", "b"]
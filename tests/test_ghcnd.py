@@ -0,0 +1,128 @@
+"""
+Tests for jasper.ghcnd
+
+The code is licensed under the MIT license.
+"""
+
+import random
+import pandas as pd
+import pytest
+from jasper.ghcnd import parse_dly
+
+STATION = "GME00121150"
+
+
+def make_dly(seed: int = 0) -> bytes:
+    """
+    Generate a .dly file with missing values, flags & gaps per element
+    """
+    rng = random.Random(seed)
+    lines = []
+
+    for year in (1999, 2000):
+        for month in range(1, 13):
+            for element in ("TMAX", "TMIN", "PRCP", "SNWD", "TSUN"):
+                # Not every element is reported every month
+                if element != "TMAX" and rng.random() < 0.2:
+                    continue
+                line = f"{STATION}{year}{month:02d}{element}"
+                for _ in range(31):
+                    if rng.random() < 0.15:
+                        line += "-9999   "
+                    else:
+                        line += f"{rng.randint(-300, 3000):5d}"
+                        line += "".join(rng.choice(" ISDGT") for _ in range(3))
+                lines.append(line)
+
+    # Elements which start in a later month
+    lines.append(f"{STATION}200003WSFG" + "  120  S" * 31)
+
+    return ("\n".join(lines) + "\n").encode()
+
+
+def reference_dly(data: bytes, station_id: str) -> pd.DataFrame:
+    """
+    Parse a .dly file like the original line-by-line parser
+    """
+    records = {}
+
+    for line in data.decode().splitlines():
+        year, month, element = line[11:15], line[15:17], line[17:21]
+        for day in range(31):
+            field = line[21 + day * 8 : 29 + day * 8]
+            if field[:5] == "-9999":
+                continue
+            records.setdefault(element, []).append(
+                {
+                    "ID": station_id,
+                    "YEAR": year,
+                    "MONTH": month,
+                    "DAY": str(day + 1),
+                    element: float(field[:5]),
+                    element
+                    + "_FLAGS": "".join(
+                        flag if flag.strip() else "_" for flag in field[5:]
+                    ),
+                }
+            )
+
+    frames = []
+    for element, rows in records.items():
+        df = pd.DataFrame(rows)
+        df.index = df["YEAR"] + "-" + df["MONTH"] + "-" + df["DAY"].str.zfill(2)
+        frames.append(df)
+
+    # Dates are aligned by index, rows of the first element are kept
+    df = pd.concat(frames, axis=1, sort=False)
+    df.index.name = "MM/DD/YYYY"
+    df = df.loc[:, ~df.columns.duplicated()]
+
+    return df.loc[df["ID"].notnull(), :]
+
+
+def assert_same(result: pd.DataFrame, expected: pd.DataFrame) -> None:
+    """
+    Compare parsed data, ignoring string dtypes
+    """
+    pd.testing.assert_frame_equal(
+        result.astype(object), expected.astype(object), check_index_type=False
+    )
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_parse_dly(seed):
+    """
+    Results match the original parser
+    """
+    data = make_dly(seed)
+
+    assert_same(parse_dly(data, STATION), reference_dly(data, STATION))
+
+
+def test_parse_dly_line_endings():
+    """
+    Windows line endings & a missing final line break are accepted
+    """
+    data = make_dly()
+    expected = reference_dly(data, STATION)
+
+    assert_same(parse_dly(data.replace(b"\n", b"\r\n"), STATION), expected)
+    assert_same(parse_dly(data.rstrip(b"\n"), STATION), expected)
+
+
+def test_parse_dly_short_lines():
+    """
+    Lines without trailing whitespace are padded
+    """
+    data = make_dly()
+    stripped = b"\n".join(line.rstrip() for line in data.splitlines())
+
+    assert_same(parse_dly(stripped, STATION), reference_dly(data, STATION))
+
+
+def test_parse_dly_empty():
+    """
+    Files without data are rejected
+    """
+    with pytest.raises(ValueError):
+        parse_dly(b"", STATION)
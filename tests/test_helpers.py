@@ -0,0 +1,223 @@
+"""
+Tests for jasper.helpers
+
+The code is licensed under the MIT license.
+"""
+
+import csv
+from ftplib import error_perm
+import gzip
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+from threading import Thread
+from urllib.error import HTTPError
+import pytest
+from jasper.helpers import GzipCsvReader, bulk_store, http_get, single_run
+
+ROWS = [
+    ["10637", "2026-01-01", i % 24, -2.5 + i / 10, None, 'quoted "value", with comma']
+    for i in range(2500)
+]
+
+
+def to_csv(rows: list) -> bytes:
+    """
+    Format rows like the single-shot CSV export
+    """
+    output = StringIO()
+    csv.writer(output, delimiter=",").writerows(rows)
+    return output.getvalue().encode()
+
+
+def read_all(reader: GzipCsvReader, size: int) -> bytes:
+    """
+    Read a file-like object in blocks of size bytes
+    """
+    content = b""
+    while True:
+        block = reader.read(size)
+        if not block:
+            return content
+        content += block
+
+
+def test_gzip_csv_reader():
+    """
+    Decompressed output & digest match the CSV formatted at once
+    """
+    reader = GzipCsvReader(ROWS, chunk_size=1000)
+    content = reader.read()
+
+    assert gzip.decompress(content) == to_csv(ROWS)
+    assert reader.digest.hexdigest() == hashlib.sha1(to_csv(ROWS)).hexdigest()
+    assert reader.read() == b""
+
+
+def test_gzip_csv_reader_blocks():
+    """
+    Reading in small blocks returns the same file
+    """
+    content = read_all(GzipCsvReader(iter(ROWS), chunk_size=7), 100)
+
+    assert gzip.decompress(content) == to_csv(ROWS)
+
+
+def test_gzip_csv_reader_block_size():
+    """
+    Blocks are never larger than requested
+    """
+    reader = GzipCsvReader(ROWS, chunk_size=10)
+
+    sizes = []
+    while True:
+        block = reader.read(512)
+        if not block:
+            break
+        sizes.append(len(block))
+
+    assert max(sizes) == 512
+    assert all(size == 512 for size in sizes[:-1])
+
+
+def test_gzip_csv_reader_empty():
+    """
+    Empty data results in an empty file
+    """
+    reader = GzipCsvReader([])
+
+    assert reader.read() == b""
+    assert reader.digest.hexdigest() == hashlib.sha1(b"").hexdigest()
+
+
+def test_bulk_store(bulk):
+    """
+    Files are stored in binary mode, creating missing directories
+    """
+    bulk_store(bulk, "/hourly/2026/10637.csv.gz", BytesIO(b"x" * 20000), 4096)
+
+    assert bulk.files["/hourly/2026/10637.csv.gz"] == b"x" * 20000
+    assert {"/hourly", "/hourly/2026"} <= bulk.directories
+    assert bulk.commands[-2:] == ["TYPE I", "STOR /hourly/2026/10637.csv.gz"]
+
+
+def test_bulk_store_retry(bulk):
+    """
+    A rejected STOR command is retried once with fresh directories
+    """
+    bulk_store(bulk, "/hourly/10637.csv.gz", BytesIO(b"data"))
+
+    # Directory removed on the server & STOR rejected
+    bulk.directories.discard("/hourly")
+    bulk.fail_stor = 1
+    bulk_store(bulk, "/hourly/10637.csv.gz", GzipCsvReader([["10637", 1.5]]))
+
+    assert gzip.decompress(bulk.files["/hourly/10637.csv.gz"]) == b"10637,1.5\r\n"
+    assert bulk.commands.count("MKD hourly") == 2
+
+
+def test_bulk_store_retry_once(bulk):
+    """
+    A second rejected STOR command is raised
+    """
+    bulk.fail_stor = 2
+
+    with pytest.raises(error_perm):
+        bulk_store(bulk, "/hourly/10637.csv.gz", BytesIO(b"data"))
+
+    assert bulk.commands.count("STOR /hourly/10637.csv.gz") == 2
+
+
+def test_bulk_store_failed_transfer(bulk):
+    """
+    Errors after the transfer started are raised without resending
+    """
+    bulk.fail_resp = error_perm("552 Quota exceeded")
+    reader = GzipCsvReader([["10637", 1.5]] * 100)
+
+    with pytest.raises(error_perm):
+        bulk_store(bulk, "/hourly/10637.csv.gz", reader)
+
+    assert bulk.commands.count("STOR /hourly/10637.csv.gz") == 1
+    assert reader.read() == b""
+
+
+def test_single_run(jsp):
+    """
+    Overlapping runs of a task don't get the lock
+    """
+    with single_run(jsp) as first:
+        with single_run(jsp) as second:
+            assert (first, second) == (True, False)
+
+    # Released after the block
+    with single_run(jsp) as third:
+        assert third
+
+
+class RedirectHandler(BaseHTTPRequestHandler):
+    """
+    Serve a JSON file behind redirects
+    """
+
+    routes = {
+        "/data.json": (200, {}),
+        "/moved": (301, {"Location": "/data.json"}),
+        "/relative/found": (302, {"Location": "../moved"}),
+        "/loop": (302, {"Location": "/loop"}),
+        "/not-modified": (304, {}),
+        "/missing": (404, {}),
+    }
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Send the response of a route
+        """
+        status, headers = self.routes[self.path]
+        body = gzip.compress(b'{"ok": true}') if status == 200 else b""
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status == 200:
+            self.send_header("Content-Encoding", "gzip")
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+@pytest.fixture
+def http_server():
+    """
+    Local HTTP server, yields its base URL
+    """
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RedirectHandler)
+    Thread(target=httpd.serve_forever, args=(0.05,), daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.mark.parametrize("path", ["/data.json", "/moved", "/relative/found"])
+def test_http_get(http_server, path):
+    """
+    Bodies are decompressed and redirects followed
+    """
+    assert http_get(http_server + path) == b'{"ok": true}'
+
+
+@pytest.mark.parametrize(
+    "path, status", [("/loop", 302), ("/not-modified", 304), ("/missing", 404)]
+)
+def test_http_get_errors(http_server, path, status):
+    """
+    Redirect loops & all other non-2xx responses raise HTTPError
+    """
+    with pytest.raises(HTTPError) as error:
+        http_get(http_server + path)
+
+    assert error.value.code == status
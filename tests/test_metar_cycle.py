@@ -0,0 +1,176 @@
+"""
+Tests for cron/import/noaa/hourly/metar_cycle.py
+
+The code is licensed under the MIT license.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+from threading import Thread
+import pytest
+
+pytest.importorskip("metar")
+
+SCRIPT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "cron",
+    "import",
+    "noaa",
+    "hourly",
+    "metar_cycle.py",
+)
+
+# Meteostat ID by ICAO code
+STATIONS = {"EDDF": "10637", "KJFK": "74486", "LFPG": "07157", "EGLL": "03772"}
+
+EDDF = b"2026/10/18 10:50\nEDDF 181050Z 24012KT 9999 -RA BKN012 07/05 Q1012 NOSIG\n"
+KJFK = b"2026/10/18 10:51\nKJFK 181051Z 31015G25KT 10SM FEW250 M02/M13 A3012\n"
+LFPG = b"2026/10/18 11:00\nLFPG 181100Z 00000KT CAVOK 10/M01 Q1030\n"
+EGLL = b"2026/10/18 11:20\nEGLL 181120Z 22008KT 9999 SCT030 12/08 Q1021\n"
+
+
+class CycleServer(ThreadingHTTPServer):
+    """
+    HTTP server for a single cycle file, supporting byte ranges
+    """
+
+    content = b""
+    # Range headers of all requests
+    ranges = []
+
+
+class CycleHandler(BaseHTTPRequestHandler):
+    """
+    Serve the cycle file of the server
+    """
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Send the (partial) cycle file
+        """
+        content = self.server.content
+        header = self.headers.get("Range")
+        self.server.ranges.append(header)
+
+        if header is None:
+            self.send_response(200)
+        else:
+            start = int(header[len("bytes=") : -1])
+            if start >= len(content):
+                self.send_response(416)
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(content) - 1}/{len(content)}"
+            )
+            content = content[start:]
+
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+@pytest.fixture
+def server():
+    """
+    Local cycle file server
+    """
+    httpd = CycleServer(("127.0.0.1", 0), CycleHandler)
+    httpd.ranges = []
+    Thread(target=httpd.serve_forever, args=(0.05,), daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def run(server, run_script, tmp_path):
+    """
+    Import a cycle file and get the stations of all persisted reports
+    """
+
+    def run_cycle(content: bytes, use_range: bool = True) -> list:
+        server.content = content
+        server.ranges.clear()
+
+        persisted = run_script(
+            SCRIPT,
+            "[import]\n"
+            + "workers = 1\n"
+            + f"metar_store = {tmp_path / 'metar.db'}\n"
+            + f"metar_range = {'yes' if use_range else 'no'}\n"
+            + f"metar_url = http://127.0.0.1:{server.server_address[1]}/cycles\n",
+            STATIONS,
+            ["0"],
+        )
+
+        return sorted(
+            station for df in persisted for station in df.index.get_level_values(0)
+        )
+
+    return run_cycle
+
+
+def test_range(run, server):
+    """
+    Only the appended tail of a cycle file is downloaded
+    """
+    assert run(EDDF) == ["10637"]
+    assert server.ranges == [None]
+
+    assert run(EDDF + KJFK) == ["74486"]
+    assert server.ranges == [f"bytes={len(EDDF) - 1}-"]
+
+    # Nothing new
+    assert run(EDDF + KJFK) == []
+    assert server.ranges == [f"bytes={len(EDDF + KJFK) - 1}-"]
+
+
+def test_range_partial_line(run, server):
+    """
+    Incomplete last lines are imported with the next download
+    """
+    assert run(EDDF + LFPG[:-12]) == ["10637"]
+    assert run(EDDF + LFPG) == ["07157"]
+
+    # Download continues after the last complete (date) line
+    offset = len(EDDF) + LFPG.index(b"\n") + 1
+    assert server.ranges == [f"bytes={offset - 1}-"]
+
+
+def test_range_replaced_file(run, server):
+    """
+    Replaced files are downloaded completely and only new reports imported
+    """
+    assert run(EDDF + KJFK) == ["10637", "74486"]
+
+    # Byte before the offset isn't a line break
+    assert run(LFPG + KJFK + EDDF) == ["07157"]
+    assert server.ranges == [f"bytes={len(EDDF + KJFK) - 1}-", None]
+
+    # Appended to the replaced file
+    assert run(LFPG + KJFK + EDDF + EGLL) == ["03772"]
+    assert server.ranges == [f"bytes={len(LFPG + KJFK + EDDF) - 1}-"]
+
+
+def test_range_shorter_file(run, server):
+    """
+    Files shorter than the offset are downloaded completely
+    """
+    assert run(EDDF + KJFK) == ["10637", "74486"]
+    assert run(LFPG) == ["07157"]
+    assert server.ranges == [f"bytes={len(EDDF + KJFK) - 1}-", None]
+
+
+def test_dedupe(run, server):
+    """
+    Ingested reports are skipped without range requests
+    """
+    assert run(EDDF + KJFK, False) == ["10637", "74486"]
+    assert run(KJFK + LFPG + EDDF, False) == ["07157"]
+    assert run(KJFK + LFPG + EDDF, False) == []
+    assert server.ranges == [None]
@@ -0,0 +1,112 @@
+"""
+Tests for the local mode of cron/import/noaa/daily/global.py
+
+The code is licensed under the MIT license.
+"""
+
+import io
+import os
+import tarfile
+import pandas as pd
+import pytest
+
+SCRIPT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "cron",
+    "import",
+    "noaa",
+    "daily",
+    "global.py",
+)
+
+# Meteostat ID by GHCN ID
+STATIONS = {"GME00121150": "10637", "USW00094728": "72503"}
+
+# Imported TMAX & PRCP per Meteostat ID
+EXPECTED = {"10637": (12.5, 1.2), "72503": (-3.3, -0.4)}
+
+
+def make_dly(ghcn: str, value: int) -> bytes:
+    """
+    Generate a .dly file with one month of TMAX & PRCP
+    """
+    return (
+        f"{ghcn}202601TMAX" + f"{value:5d}   " * 31 + "\n"
+        f"{ghcn}202601PRCP" + f"{value // 10:5d}   " * 28 + "-9999   " * 3 + "\n"
+    ).encode()
+
+
+FILES = {
+    "GME00121150": make_dly("GME00121150", 125),
+    "USW00094728": make_dly("USW00094728", -33),
+    # Unknown station
+    "ASN00000001": make_dly("ASN00000001", 1),
+}
+
+
+@pytest.fixture
+def run(run_script):
+    """
+    Run the import script and get all persisted data
+    """
+
+    def run_import(path: str, workers: int) -> pd.DataFrame:
+        persisted = run_script(
+            SCRIPT, f"[import]\nworkers = {workers}\n", STATIONS, [path]
+        )
+
+        return pd.concat(persisted).sort_index()
+
+    return run_import
+
+
+def make_archive(path: str, mode: str) -> None:
+    """
+    Create a ghcnd_all archive with all .dly files & a readme
+    """
+    with tarfile.open(path, mode) as archive:
+        for name, content in [*FILES.items(), ("readme", b"GHCN-Daily")]:
+            info = tarfile.TarInfo(
+                f"ghcnd_all/{name}.dly" if name != "readme" else "ghcnd_all/readme.txt"
+            )
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+
+
+def check(df: pd.DataFrame) -> None:
+    """
+    Check the imported data of all known stations
+    """
+    assert set(df.index.get_level_values("station")) == set(STATIONS.values())
+    assert len(df) == 62
+
+    for station, (tmax, prcp) in EXPECTED.items():
+        data = df.loc[station]
+        assert list(data.index) == [f"2026-01-{day:02d}" for day in range(1, 32)]
+        assert data["tmax"].tolist() == [tmax] * 31
+        assert data["prcp"].iloc[:28].tolist() == [prcp] * 28
+        assert data["prcp"].iloc[28:].isna().all()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("mode", ["w:gz", "w"])
+def test_import_archive(run, tmp_path, mode, workers):
+    """
+    Stations are imported from a (gzipped) tar archive
+    """
+    path = str(tmp_path / "ghcnd_all.tar.gz")
+    make_archive(path, mode)
+
+    check(run(path, workers))
+
+
+def test_import_directory(run, tmp_path):
+    """
+    Stations are imported from a directory of .dly files
+    """
+    directory = tmp_path / "all"
+    directory.mkdir()
+    for ghcn, content in FILES.items():
+        (directory / f"{ghcn}.dly").write_bytes(content)
+
+    check(run(str(directory), 1))
@@ -0,0 +1,132 @@
+"""
+Tests for jasper.validation
+
+The code is licensed under the MIT license.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from jasper import validation
+from jasper.validation import VECTORIZED, validate
+
+# Values around the limits of all validators
+VALUES = [
+    None,
+    np.nan,
+    -101,
+    -100,
+    -0.1,
+    0,
+    0.5,
+    8,
+    8.1,
+    27,
+    28,
+    60,
+    65,
+    66,
+    100,
+    101,
+    250,
+    251,
+    350,
+    351,
+    360,
+    361,
+    500,
+    849,
+    850,
+    1013.2,
+    1090,
+    1091,
+    1368,
+    1440,
+    2000,
+    9999,
+    10000,
+    11000,
+    44640,
+    50000,
+]
+
+
+@pytest.mark.parametrize(
+    "validator", list(VECTORIZED), ids=lambda validator: validator.__name__
+)
+def test_vectorized_matches_scalar(validator):
+    """
+    Vectorized validators return the same values as their scalar versions
+    """
+    series = pd.Series(VALUES, dtype=float)
+    expected = [validator(value) for value in VALUES]
+
+    result = VECTORIZED[validator](series)
+
+    assert [None if pd.isna(value) else value for value in result] == expected
+
+
+def test_mask_array():
+    """
+    NumPy arrays are validated and returned as arrays
+    """
+    result = validation.temp_array(np.array([1.5, -150, np.nan]))
+
+    assert isinstance(result, np.ndarray)
+    np.testing.assert_array_equal(result, [1.5, np.nan, np.nan])
+
+
+def test_mask_unchanged():
+    """
+    Valid input is returned as is
+    """
+    series = pd.Series([1.0, 2.0], name="temp")
+
+    assert validation.temp_array(series) is series
+
+
+def test_mask_keeps_index():
+    """
+    Index & name of a Series are kept
+    """
+    series = pd.Series([5.0, 200.0], index=["a", "b"], name="rhum")
+    result = validation.rhum_array(series)
+
+    assert result.name == "rhum"
+    assert list(result.index) == ["a", "b"]
+    assert result["a"] == 5.0
+    assert np.isnan(result["b"])
+
+
+def test_validate_clip():
+    """
+    Visibility is clipped instead of removed
+    """
+    result = validate(pd.Series([10000.0, 500.0, -1.0]), validation.vsby)
+
+    assert result.tolist()[:2] == [9999.0, 500.0]
+    assert np.isnan(result[2])
+
+
+def test_validate_object_fallback():
+    """
+    Columns which cannot be cast to float use the scalar validator
+    """
+    result = validate(pd.Series([20.0, "n/a", 70.0], dtype=object), validation.temp)
+
+    assert result[0] == 20.0
+    assert result[1:].isna().all()
+
+
+def test_validate_scalar_only():
+    """
+    Validators without vectorized version are applied per value
+    """
+
+    def positive(value):
+        return value if value > 0 else None
+
+    result = validate(pd.Series([1, -1]), positive)
+
+    assert result[0] == 1
+    assert pd.isna(result[1])